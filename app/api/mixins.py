@@ -0,0 +1,139 @@
+import orjson
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+from app.utils.cache import get_or_set_tagged_body, read_cache_key, unpack_body
+
+
+def _accepts_encoding(request, coding):
+    """Whether ``Accept-Encoding`` allows ``coding`` with a non-zero q-value (``*`` applies if it is not listed)."""
+    qvalues = {}
+    for item in request.headers.get('Accept-Encoding', '').split(','):
+        name, *params = [part.strip() for part in item.split(';')]
+        if not name:
+            continue
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qvalues[name.lower()] = q
+    return qvalues.get(coding, qvalues.get('*', 0.0)) > 0
+
+
+class CachedBodyResponse(Response):
+    """``Response`` carrying an already rendered (possibly deflated) body from ``get_or_set_tagged_body``.
+
+    The body is sent as is; ``data`` is only decoded if something in-process reads it, e.g. tests.
+    """
+
+    def __init__(self, entry, compressed=False, **kwargs):
+        self._entry = entry
+        self._compressed = compressed
+        super().__init__(**kwargs)
+
+    @property
+    def data(self):
+        if self._data is None and self._entry['body']:
+            self._data = orjson.loads(unpack_body(self._entry))
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        self._data = value
+
+    @property
+    def rendered_content(self):
+        if self.status_code == status.HTTP_304_NOT_MODIFIED:
+            return b''
+        self['Content-Type'] = self._entry['content_type']
+        if self._compressed:
+            self['Content-Encoding'] = self._entry['encoding']
+            return self._entry['body']
+        return unpack_body(self._entry)
+
+
+class TaggedCacheMixin:
+    """Read-through caching of ``list`` and ``retrieve`` for ViewSets.
+
+    The final rendered JSON body is cached with its content type and ETag, so a hit is served without
+    building, parsing or re-encoding Python objects; conditional requests get a 304. Entries carry tag
+    generations and are invalidated by bumping tags from model signals and service mutators (see
+    ``app/signals.py``), never by scanning keys. Non-JSON renderers (the browsable API) bypass the cache.
+    """
+
+    cache_namespace = None
+    cache_list_tags = ()
+    cache_timeout = None  # READ_CACHE_TIMEOUT
+
+    def cache_detail_tags(self, lookup):
+        """Tags known from the URL alone, snapshotted before the object is loaded."""
+        return ()
+
+    def cache_instance_tags(self, instance):
+        """Tags derived from the loaded object."""
+        return ()
+
+    def list(self, request, *args, **kwargs):
+        parent_list = super().list
+
+        def load():
+            return parent_list(request, *args, **kwargs).data, ()
+
+        return self._cached_response(request, load, self.cache_list_tags, 'list', request.get_full_path())
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup = kwargs[self.lookup_url_kwarg or self.lookup_field]
+
+        def load():
+            instance = self.get_object()
+            return self.get_serializer(instance).data, self.cache_instance_tags(instance)
+
+        return self._cached_response(request, load, self.cache_detail_tags(lookup), 'detail', lookup)
+
+    def _cached_response(self, request, load, tags, *key_parts):
+        renderer, media_type = request.accepted_renderer, request.accepted_media_type
+        if renderer.format != 'json':
+            return Response(load()[0])
+
+        def render():
+            data, extra_tags = load()
+            return renderer.render(data, media_type, self.get_renderer_context()), renderer.media_type, extra_tags
+
+        key = read_cache_key(self.cache_namespace, *key_parts, media_type)
+        entry = get_or_set_tagged_body(key, render, tags=tags, timeout=self.cache_timeout)
+        compressed = bool(entry['encoding']) and _accepts_encoding(request, entry['encoding'])
+        # Each representation gets its own strong ETag so caches never swap a deflated body for a plain one.
+        etag = f'{entry["etag"][:-1]}-{entry["encoding"]}"' if compressed else entry['etag']
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = CachedBodyResponse(entry, compressed=compressed, status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = CachedBodyResponse(entry, compressed=compressed)
+        response['ETag'] = etag
+        patch_vary_headers(response, ['Accept', 'Accept-Encoding'])
+        return response
+
+
+class ProjectionListMixin:
+    """``list`` built from ``values(*list_columns)`` rows instead of model instances and a serializer.
+
+    ``list_representation`` must return exactly what the ViewSet's serializer would for the row. Place it
+    after ``TaggedCacheMixin`` in the bases so cached lists are filled from the projection.
+    """
+
+    list_columns = ()
+
+    def list_representation(self, row):
+        raise NotImplementedError
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset()).values(*self.list_columns)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response([self.list_representation(row) for row in page])
+        return Response([self.list_representation(row) for row in queryset])
@@ -0,0 +1,163 @@
+import base64
+import json
+from datetime import datetime
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import connections
+from django.db.models import BooleanField, Expression, F, Q, Value
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+def encode_cursor(position):
+    """Opaque token for a keyset position (a list of ordering values)."""
+    return base64.urlsafe_b64encode(json.dumps(position, separators=(',', ':')).encode()).decode()
+
+
+def decode_cursor(token):
+    try:
+        position = json.loads(base64.urlsafe_b64decode(token.encode()))
+    except (ValueError, TypeError):
+        position = None
+    if not isinstance(position, list) or not position:
+        raise ValidationError({'cursor': 'Invalid cursor.'})
+    return position
+
+
+def approximate_count(queryset):
+    """Row estimate from the planner's statistics for the queryset, without scanning it."""
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class RowComparison(Expression):
+    """``(a, b, ...) <op> (x, y, ...)`` as one SQL row-value comparison, usable in ``filter()``."""
+
+    output_field = BooleanField()
+
+    def __init__(self, lhs, op, rhs):
+        super().__init__()
+        self.lhs, self.op, self.rhs = list(lhs), op, list(rhs)
+
+    def get_source_expressions(self):
+        return [*self.lhs, *self.rhs]
+
+    def set_source_expressions(self, exprs):
+        self.lhs, self.rhs = exprs[: len(self.lhs)], exprs[len(self.lhs) :]
+
+    def as_sql(self, compiler, connection):
+        sides, params = [], []
+        for exprs in (self.lhs, self.rhs):
+            parts = []
+            for expr in exprs:
+                sql, expr_params = compiler.compile(expr)
+                parts.append(sql)
+                params.extend(expr_params)
+            sides.append(', '.join(parts))
+        return f'({sides[0]}) {self.op} ({sides[1]})', params
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination on a unique, indexed ordering; cost is independent of page depth.
+
+    Views set ``keyset_ordering`` (e.g. ``('-created_at', '-id')``) whose last field must be unique.
+    Works on model instances and on ``values()`` rows that include the ordering columns.
+    No total is computed unless the client passes ``?count=approx``, which adds a planner estimate.
+    """
+
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = 100
+    ordering = ('-id',)
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    count_query_param = 'count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = getattr(view, 'keyset_ordering', self.ordering)
+        fields = [queryset.model._meta.get_field(name.lstrip('-')) for name in self.ordering]
+        self.count = (
+            approximate_count(queryset) if request.query_params.get(self.count_query_param) == 'approx' else None
+        )
+        queryset = queryset.order_by(*self.ordering)
+        token = request.query_params.get(self.cursor_query_param)
+        if token:
+            position = decode_cursor(token)
+            if len(position) != len(fields):
+                raise ValidationError({'cursor': 'Invalid cursor.'})
+            try:
+                position = [field.to_python(value) for field, value in zip(fields, position)]
+            except (DjangoValidationError, TypeError, ValueError):
+                raise ValidationError({'cursor': 'Invalid cursor.'})
+            queryset = queryset.filter(self._after(fields, position))
+        size = self.get_page_size(request)
+        rows = list(queryset[: size + 1])
+        self.has_next = len(rows) > size
+        self.page = rows[:size]
+        self.next_position = [self._position_value(self.page[-1], field) for field in fields] if self.has_next else None
+        return self.page
+
+    def _after(self, fields, position):
+        """Rows strictly after ``position`` in the ordering.
+
+        A single-direction ordering becomes one row-value comparison, which Postgres answers with a
+        range seek on the composite index; mixed directions fall back to the expanded ``Q`` terms.
+        """
+        descending = {name.startswith('-') for name in self.ordering}
+        if len(descending) == 1:
+            return RowComparison(
+                [F(field.name) for field in fields],
+                '<' if descending.pop() else '>',
+                [Value(value, output_field=field) for field, value in zip(fields, position)],
+            )
+        condition = Q()
+        for i, name in enumerate(self.ordering):
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            term = Q(**{f'{name.lstrip("-")}__{lookup}': position[i]})
+            for prior, value in zip(self.ordering[:i], position[:i]):
+                term &= Q(**{prior.lstrip('-'): value})
+            condition |= term
+        return condition
+
+    @staticmethod
+    def _position_value(row, field):
+        value = row[field.attname] if isinstance(row, dict) else getattr(row, field.attname)
+        return value.isoformat() if isinstance(value, datetime) else value
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.cursor_query_param, encode_cursor(self.next_position)
+        )
+
+    def get_paginated_response(self, data):
+        body = {'next': self.get_next_link(), 'results': data}
+        if self.count is not None:
+            body = {'count': self.count, **body}
+        return Response(body)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'count': {'type': 'integer', 'description': 'Planner estimate; only with ?count=approx.'},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,17 @@
+import csv
+import io
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class CSVParser(BaseParser):
+    """``text/csv`` body with a header row, parsed into a list of dicts keyed by column."""
+
+    media_type = 'text/csv'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return list(csv.DictReader(io.StringIO(stream.read().decode('utf-8-sig'))))
+        except (csv.Error, UnicodeDecodeError) as e:
+            raise ParseError(f'CSV parse error - {e}')
@@ -0,0 +1,19 @@
+import orjson
+from rest_framework.renderers import JSONRenderer
+
+
+class ORJSONRenderer(JSONRenderer):
+    """Byte-for-byte ``JSONRenderer`` output (compact, UTF-8) produced by orjson.
+
+    Types orjson does not handle itself, datetimes included, go through DRF's encoder so they render
+    exactly as before; indented output is delegated to the stock renderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        ret = orjson.dumps(data, default=self.encoder_class().default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+        # Match JSONRenderer, which escapes these for safe embedding in JavaScript.
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
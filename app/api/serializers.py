@@ -1,8 +1,20 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.gis.geos import Point
 from rest_framework import serializers
 
-from app.models import Address, Inventory, Merchant, Order, OrderItem, Product, ProductCategory
+from app.models import (
+    Address,
+    Inventory,
+    Merchant,
+    Order,
+    OrderItem,
+    Product,
+    ProductCategory,
+    StockReservation,
+    StockReservationItem,
+)
+from app.utils.render import drf_datetime, drf_decimal
 
 User = get_user_model()
 
@@ -66,6 +78,23 @@ class ProductSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'description', 'category', 'merchant', 'price', 'is_published', 'created_at']
 
 
+PRODUCT_COLUMNS = ('id', 'name', 'description', 'category_id', 'merchant_id', 'price', 'is_published', 'created_at')
+
+
+def product_representation(row):
+    """``ProductSerializer`` output for a ``values(*PRODUCT_COLUMNS)`` row, without per-field serializer calls."""
+    return {
+        'id': row['id'],
+        'name': row['name'],
+        'description': row['description'],
+        'category': row['category_id'],
+        'merchant': row['merchant_id'],
+        'price': drf_decimal(row['price']),
+        'is_published': row['is_published'],
+        'created_at': drf_datetime(row['created_at']),
+    }
+
+
 class InventorySerializer(serializers.ModelSerializer):
     merchant = serializers.PrimaryKeyRelatedField(queryset=Merchant.objects.all())
     product = serializers.PrimaryKeyRelatedField(queryset=Product.objects.all())
@@ -83,12 +112,53 @@ class OrderItemSerializer(serializers.ModelSerializer):
         fields = ['id', 'product', 'quantity', 'unit_price', 'line_total']
 
 
+class OrderLineSerializer(serializers.Serializer):
+    """Write-side order line; products are resolved in bulk by the service layer."""
+
+    product = serializers.IntegerField(min_value=1)
+    quantity = serializers.IntegerField(min_value=1)
+
+
 class OrderSerializer(serializers.ModelSerializer):
     merchant = serializers.PrimaryKeyRelatedField(queryset=Merchant.objects.all())
     user = serializers.PrimaryKeyRelatedField(queryset=User.objects.all())
     address = serializers.PrimaryKeyRelatedField(queryset=Address.objects.all())
-    items = OrderItemSerializer(many=True, required=False)
+    items = OrderItemSerializer(many=True, read_only=True)
 
     class Meta:
         model = Order
         fields = ['id', 'user', 'merchant', 'address', 'status', 'total', 'created_at', 'updated_at', 'items']
+        read_only_fields = ['total']
+
+
+class CartCheckoutSerializer(serializers.Serializer):
+    address = serializers.PrimaryKeyRelatedField(queryset=Address.objects.all())
+    items = OrderLineSerializer(many=True, allow_empty=False)
+
+
+class ReservationCreateSerializer(serializers.Serializer):
+    items = OrderLineSerializer(many=True, allow_empty=False)
+    ttl = serializers.IntegerField(min_value=1, required=False)
+
+    def validate_ttl(self, value):
+        if value > settings.RESERVATION_MAX_TTL_SECONDS:
+            raise serializers.ValidationError(f'Must be at most {settings.RESERVATION_MAX_TTL_SECONDS} seconds.')
+        return value
+
+
+class ReservationCheckoutSerializer(serializers.Serializer):
+    address = serializers.PrimaryKeyRelatedField(queryset=Address.objects.all())
+
+
+class StockReservationItemSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = StockReservationItem
+        fields = ['product', 'quantity']
+
+
+class StockReservationSerializer(serializers.ModelSerializer):
+    items = StockReservationItemSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = StockReservation
+        fields = ['id', 'status', 'expires_at', 'created_at', 'items']
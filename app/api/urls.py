@@ -2,16 +2,24 @@ from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
 from .views import (
+    CartCheckoutView,
+    CourierLocationIngestView,
     DeliveryETAView,
     HealthCheckView,
     InventoryViewSet,
     MerchantViewSet,
     OrderAnalyticsView,
+    OrderExportView,
     OrderViewSet,
     PriorityAssignmentView,
+    ProductAutocompleteView,
     ProductNearbyView,
+    ProductSearchView,
     ProductsInZoneView,
     ProductViewSet,
+    ReservationCheckoutView,
+    ReservationDetailView,
+    ReservationView,
 )
 
 router = DefaultRouter()
@@ -24,10 +32,18 @@ urlpatterns = [
     path('', include(router.urls)),
     path('health/', HealthCheckView.as_view(), name='health-check'),
     path('custom/products/nearby/', ProductNearbyView.as_view(), name='product-nearby'),
+    path('custom/products/search/', ProductSearchView.as_view(), name='product-search'),
+    path('custom/products/autocomplete/', ProductAutocompleteView.as_view(), name='product-autocomplete'),
     path('custom/products/in-zone/', ProductsInZoneView.as_view(), name='products-in-zone'),
     path('delivery/eta/', DeliveryETAView.as_view(), name='delivery-eta'),
     path('custom/orders/priority-assignment/', PriorityAssignmentView.as_view(), name='priority-assignment'),
     path('custom/orders/analytics/', OrderAnalyticsView.as_view(), name='order-analytics'),
+    path('custom/orders/export/', OrderExportView.as_view(), name='order-export'),
+    path('custom/orders/checkout/', CartCheckoutView.as_view(), name='cart-checkout'),
+    path('custom/reservations/', ReservationView.as_view(), name='reservation-list'),
+    path('custom/reservations/<uuid:pk>/', ReservationDetailView.as_view(), name='reservation-detail'),
+    path('custom/reservations/<uuid:pk>/checkout/', ReservationCheckoutView.as_view(), name='reservation-checkout'),
+    path('couriers/locations/', CourierLocationIngestView.as_view(), name='courier-locations'),
 ]
 
 app_name = 'api'
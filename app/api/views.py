@@ -1,21 +1,74 @@
-import asyncio
+import json
+from datetime import date
 
-from django.contrib.gis.db.models.functions import Distance
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.gis.geos import Point
 from django.contrib.gis.measure import D
 from django.db import DatabaseError, connection
-from django.db.models import F, Sum, Window
-from django.db.models.functions import Rank
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 from rest_framework import status, viewsets
-from rest_framework.permissions import AllowAny, IsAuthenticatedOrReadOnly
+from rest_framework.decorators import action
+from rest_framework.exceptions import APIException, NotAuthenticated, PermissionDenied, ValidationError
+from rest_framework.parsers import JSONParser, MultiPartParser
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated, IsAuthenticatedOrReadOnly
+from rest_framework.renderers import BrowsableAPIRenderer
+from rest_framework.request import Request
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
 from rest_framework.views import APIView
 
-from app.models import Address, DeliveryZone, Inventory, Merchant, Order, OrderItem, Product
-from app.services import DeliveryService, InventoryService, MerchantService, OrderService, ProductService
-from app.utils.cache import get_cached_product_search, set_cached_product_search
-
-from .serializers import InventorySerializer, MerchantSerializer, OrderSerializer, ProductSerializer
+from app.models import Address, DeliveryZone, Inventory, Merchant, Order, Product
+from app.services import (
+    DeliveryService,
+    DeliveryZoneService,
+    InventoryService,
+    MerchantService,
+    OrderService,
+    ProductService,
+    ReservationService,
+    SalesRollupService,
+)
+from app.tasks import bulk_upsert_inventory
+from app.utils.cache import (
+    INVENTORIES_TAG,
+    MERCHANTS_TAG,
+    PRODUCTS_TAG,
+    cache_stats_snapshot,
+    category_tag,
+    get_or_load_nearby_tile,
+    merchant_tag,
+    nearby_tile_cover,
+    nearby_tile_for,
+    nearest_from_tile,
+    product_tag,
+)
+from app.utils.courier_store import get_courier_store, parse_pings
+from app.utils.dispatch import rank_couriers
+from app.utils.export import EXPORT_FORMATS, iter_export, order_export_rows
+from app.utils.render import drf_decimal
+
+from .mixins import ProjectionListMixin, TaggedCacheMixin
+from .pagination import KeysetPagination, decode_cursor, encode_cursor
+from .parsers import CSVParser
+from .renderers import ORJSONRenderer
+from .serializers import (
+    PRODUCT_COLUMNS,
+    CartCheckoutSerializer,
+    InventorySerializer,
+    MerchantSerializer,
+    OrderLineSerializer,
+    OrderSerializer,
+    ProductSerializer,
+    ReservationCheckoutSerializer,
+    ReservationCreateSerializer,
+    StockReservationSerializer,
+    product_representation,
+)
 
 
 class HealthCheckView(APIView):
@@ -26,13 +79,21 @@ class HealthCheckView(APIView):
                 cursor.fetchone()
         except DatabaseError as e:
             return Response({'status': 'error', 'db': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        return Response({'status': 'ok'}, status=status.HTTP_200_OK)
+        return Response({'status': 'ok', 'cache': cache_stats_snapshot()}, status=status.HTTP_200_OK)
 
 
-class MerchantViewSet(viewsets.ModelViewSet):
+class MerchantViewSet(TaggedCacheMixin, viewsets.ModelViewSet):
     queryset = Merchant.objects.select_related('address').prefetch_related('categories', 'delivery_zones').all()
     serializer_class = MerchantSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    cache_namespace = 'merchants'
+    cache_list_tags = (MERCHANTS_TAG,)
+
+    def cache_detail_tags(self, lookup):
+        return (merchant_tag(lookup),)
+
+    def cache_instance_tags(self, instance):
+        return [category_tag(c.pk) for c in instance.categories.all()]
 
     def perform_create(self, serializer):
         validated = serializer.validated_data.copy()
@@ -46,11 +107,64 @@ class MerchantViewSet(viewsets.ModelViewSet):
     def perform_update(self, serializer):
         serializer.save()
 
+    @action(detail=False, methods=['get'], url_path='nearby')
+    def nearby(self, request):
+        """Merchants that deliver to ``lat``/``lng``, nearest first, as ``{id, name, categories, distance_km}``.
 
-class ProductViewSet(viewsets.ModelViewSet):
+        Keyset-paged with an opaque ``cursor``; ``page_size`` is capped at ``MERCHANTS_NEARBY_MAX_PAGE_SIZE``.
+        """
+        lat, lng = _float_param(request, 'lat'), _float_param(request, 'lng')
+        if lat is None or lng is None:
+            raise ValidationError({'detail': 'lat and lng are required.'})
+        try:
+            size = int(request.query_params.get('page_size', settings.MERCHANTS_NEARBY_PAGE_SIZE))
+        except ValueError:
+            raise ValidationError({'page_size': 'Must be an integer.'})
+        size = max(1, min(size, settings.MERCHANTS_NEARBY_MAX_PAGE_SIZE))
+        cursor = request.query_params.get('cursor')
+        after = decode_cursor(cursor) if cursor else None
+        if after is not None:
+            try:
+                after = (float(after[0]), int(after[1]))
+            except (IndexError, TypeError, ValueError):
+                raise ValidationError({'cursor': 'Invalid cursor.'})
+        rows = MerchantService.nearby_deliverers(lat, lng, after=after, limit=size + 1)
+        page = rows[:size]
+        next_url = None
+        if len(rows) > size:
+            position = [page[-1]['distance'].m, page[-1]['id']]
+            next_url = replace_query_param(request.build_absolute_uri(), 'cursor', encode_cursor(position))
+        results = [
+            {
+                'id': row['id'],
+                'name': row['name'],
+                'categories': row['category_names'],
+                'distance_km': round(row['distance'].km, 3),
+            }
+            for row in page
+        ]
+        return Response({'next': next_url, 'results': results})
+
+
+class ProductViewSet(TaggedCacheMixin, ProjectionListMixin, viewsets.ModelViewSet):
     queryset = Product.objects.all().select_related('merchant', 'category')
     serializer_class = ProductSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    renderer_classes = [ORJSONRenderer, BrowsableAPIRenderer]
+    pagination_class = KeysetPagination
+    list_columns = PRODUCT_COLUMNS
+    keyset_ordering = ('-created_at', '-id')
+    cache_namespace = 'products'
+    cache_list_tags = (PRODUCTS_TAG,)
+
+    def cache_detail_tags(self, lookup):
+        return (product_tag(lookup),)
+
+    def list_representation(self, row):
+        return product_representation(row)
+
+    def cache_instance_tags(self, instance):
+        return (merchant_tag(instance.merchant_id), category_tag(instance.category_id))
 
     def perform_create(self, serializer):
         validated = serializer.validated_data
@@ -69,10 +183,57 @@ class ProductViewSet(viewsets.ModelViewSet):
         serializer.save()
 
 
-class InventoryViewSet(viewsets.ModelViewSet):
+class InventoryViewSet(TaggedCacheMixin, viewsets.ModelViewSet):
     queryset = Inventory.objects.select_related('merchant', 'product').all()
     serializer_class = InventorySerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('id',)
+    cache_namespace = 'inventories'
+    cache_list_tags = (INVENTORIES_TAG,)
+
+    def cache_instance_tags(self, instance):
+        return (merchant_tag(instance.merchant_id), product_tag(instance.product_id))
+
+    @action(
+        detail=False,
+        methods=['post'],
+        url_path='bulk',
+        permission_classes=[IsAuthenticated],
+        parser_classes=[JSONParser, CSVParser, MultiPartParser],
+    )
+    def bulk(self, request):
+        """Upsert the caller's stock levels from a JSON array, a ``text/csv`` body or a CSV ``file`` upload.
+
+        Rows are ``product,stock``. Payloads over ``INVENTORY_BULK_SYNC_MAX_ROWS`` rows are queued (202).
+        """
+        merchant = getattr(request.user, 'merchant_profile', None)
+        if merchant is None:
+            raise PermissionDenied('Only merchants can sync inventory.')
+        upload = request.FILES.get('file') if request.content_type.startswith('multipart/') else None
+        if upload is not None:
+            rows = CSVParser().parse(upload)
+        else:
+            rows = request.data
+        if not isinstance(rows, list):
+            raise ValidationError({'detail': 'Expected a list of {product, stock} rows.'})
+        if len(rows) > settings.INVENTORY_BULK_SYNC_MAX_ROWS:
+            task = bulk_upsert_inventory.delay(merchant.pk, rows)
+            return Response({'task_id': task.id, 'rows': len(rows)}, status=status.HTTP_202_ACCEPTED)
+        return Response(InventoryService.bulk_upsert(merchant.pk, rows))
+
+    @action(detail=True, methods=['post'], url_path='hot', permission_classes=[IsAdminUser])
+    def hot(self, request, pk=None):
+        """Switch a SKU into flash-sale mode with ``{"shards": n}`` (default ``INVENTORY_HOT_SHARDS``); 0 ends it."""
+        shards = request.data.get('shards', settings.INVENTORY_HOT_SHARDS)
+        try:
+            shards = int(shards)
+        except (TypeError, ValueError):
+            shards = -1
+        if not 0 <= shards <= 256:
+            raise ValidationError({'shards': 'Must be an integer between 0 and 256.'})
+        inv = InventoryService.set_hot_mode(self.get_object().pk, shards)
+        return Response({'id': inv.pk, 'stock': inv.stock, 'shard_count': inv.shard_count})
 
     def perform_create(self, serializer):
         validated = serializer.validated_data
@@ -95,28 +256,107 @@ class OrderViewSet(viewsets.ModelViewSet):
     queryset = Order.objects.select_related('user', 'merchant', 'address').prefetch_related('items__product').all()
     serializer_class = OrderSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-created_at', '-id')
 
     def perform_create(self, serializer):
         validated = serializer.validated_data
         user = validated['user']
         merchant = validated['merchant']
         address = validated['address']
-        items_data = self.request.data.get('items', [])
-        items = []
-        for item in items_data:
-            prod_id = item.get('product')
-            qty = item.get('quantity')
-            prod = Product.objects.get(pk=prod_id)
-            items.append((prod, int(qty)))
-        order = OrderService.place_order(user, merchant, address, items)
+        lines = OrderLineSerializer(data=self.request.data.get('items', []), many=True)
+        lines.is_valid(raise_exception=True)
+        try:
+            items = ProductService.resolve_lines([(line['product'], line['quantity']) for line in lines.validated_data])
+            order = OrderService.place_order(user, merchant, address, items)
+        except ValueError as e:
+            raise ValidationError({'items': str(e)})
         serializer.instance = order
 
     def perform_update(self, serializer):
         serializer.save()
 
 
-class ProductNearbyView(APIView):
+class CartCheckoutView(APIView):
+    permission_classes = [IsAuthenticated]
+    http_method_names = ['post']
+
+    def post(self, request):
+        serializer = CartCheckoutSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        validated = serializer.validated_data
+        try:
+            items = ProductService.resolve_lines([(line['product'], line['quantity']) for line in validated['items']])
+            orders = OrderService.checkout_cart(request.user, validated['address'], items)
+        except ValueError as e:
+            raise ValidationError({'items': str(e)})
+        orders = Order.objects.filter(pk__in=[o.pk for o in orders]).prefetch_related('items').order_by('pk')
+        return Response(OrderSerializer(orders, many=True).data, status=status.HTTP_201_CREATED)
+
+
+class ReservationView(APIView):
+    """Hold stock for ``items`` while the buyer pays; the hold lapses after ``ttl`` seconds."""
+
+    permission_classes = [IsAuthenticated]
+    http_method_names = ['post']
+
+    def post(self, request):
+        serializer = ReservationCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        validated = serializer.validated_data
+        try:
+            items = ProductService.resolve_lines([(line['product'], line['quantity']) for line in validated['items']])
+            reservation = ReservationService.reserve(request.user, items, ttl=validated.get('ttl'))
+        except ValueError as e:
+            raise ValidationError({'items': str(e)})
+        return Response(StockReservationSerializer(reservation).data, status=status.HTTP_201_CREATED)
+
+
+class ReservationDetailView(APIView):
+    permission_classes = [IsAuthenticated]
+    http_method_names = ['delete']
+
+    def delete(self, request, pk):
+        try:
+            ReservationService.release(pk, request.user)
+        except ValueError as e:
+            raise ValidationError({'detail': str(e)})
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class ReservationCheckoutView(APIView):
+    """Turn a live reservation into orders without touching inventory again."""
+
+    permission_classes = [IsAuthenticated]
+    http_method_names = ['post']
+
+    def post(self, request, pk):
+        serializer = ReservationCheckoutSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            orders = ReservationService.convert(pk, request.user, serializer.validated_data['address'])
+        except ValueError as e:
+            raise ValidationError({'detail': str(e)})
+        orders = Order.objects.filter(pk__in=[o.pk for o in orders]).prefetch_related('items').order_by('pk')
+        return Response(OrderSerializer(orders, many=True).data, status=status.HTTP_201_CREATED)
+
+
+class ProductNearbyView(TaggedCacheMixin, APIView):
+    """Published products near a point, nearest first.
+
+    Searches up to ``NEARBY_MAX_RADIUS_KM`` are answered from the geo-tiled cache. ``mode=knn`` (and any
+    wider search) goes straight to an index-assisted nearest-N query whose cost is bounded by ``limit``.
+    ``facets=1`` returns ``{"results", "facets"}`` instead, with category counts, a price histogram and
+    merchant count for the whole radius, computed in one query and cached per (rounded) search.
+    """
+
     http_method_names = ['get']
+    renderer_classes = [ORJSONRenderer, BrowsableAPIRenderer]
+    cache_namespace = 'nearby_facets'
+
+    @property
+    def cache_timeout(self):
+        return settings.NEARBY_TILE_TIMEOUT
 
     def get(self, request):
         try:
@@ -125,48 +365,204 @@ class ProductNearbyView(APIView):
             radius = float(request.query_params.get('radius', 5))
         except Exception:
             return Response({'detail': 'lat, lng, radius are required.'}, status=400)
+        limit = max(1, min(_int_param(request, 'limit') or 30, settings.NEARBY_MAX_LIMIT))
         pname = request.query_params.get('product_name')
-        cached = get_cached_product_search(lat, lng, radius, pname)
-        if cached:
-            return Response(cached)
-        user_point = Point(lng, lat, srid=4326)
-        qs = Product.objects.filter(
-            is_published=True, merchant__address__location__distance_lte=(user_point, D(km=radius))
+        if request.query_params.get('facets') in ('1', 'true'):
+            return self._facets(request, lat, lng, radius, limit, pname)
+        if request.query_params.get('mode') == 'knn' or radius > settings.NEARBY_MAX_RADIUS_KM:
+            rows = ProductService.nearest(lat, lng, radius, limit, pname).values(*PRODUCT_COLUMNS)
+            return Response([product_representation(row) for row in rows])
+        candidates = get_or_load_nearby_tile(nearby_tile_for(lat, lng), self._load_tile)
+        return Response(nearest_from_tile(candidates, lat, lng, radius, pname, limit=limit))
+
+    def _facets(self, request, lat, lng, radius, limit, pname):
+        # Rounded so nearby users share entries; 4 decimal places is about 11 m.
+        lat, lng = round(lat, 4), round(lng, 4)
+
+        def load():
+            products, facets = ProductService.nearby_facets(lat, lng, radius, limit, pname)
+            price = [{**b, 'min': drf_decimal(b['min']), 'max': drf_decimal(b['max'])} for b in facets['price']]
+            data = {
+                'results': [{**product_representation(row), 'distance_km': row['distance_km']} for row in products],
+                'facets': {
+                    'total': facets['total'],
+                    'merchants': facets['merchants'],
+                    'categories': facets['categories'],
+                    'price': price,
+                },
+            }
+            return data, ()
+
+        return self._cached_response(request, load, (PRODUCTS_TAG,), lat, lng, radius, limit, pname or '')
+
+    def _load_tile(self, cell):
+        (c_lat, c_lng), cover_km = nearby_tile_cover(cell)
+        rows = Product.objects.filter(
+            is_published=True,
+            merchant_location__dwithin=(Point(c_lng, c_lat, srid=4326), D(km=cover_km)),
+        ).values(*PRODUCT_COLUMNS, 'merchant_location')
+        return [[row['merchant_location'].y, row['merchant_location'].x, product_representation(row)] for row in rows]
+
+
+class ProductSearchView(APIView):
+    """Ranked, typo-tolerant product search, optionally limited to ``radius`` km around ``lat``/``lng``.
+
+    ``q`` takes web-search syntax (``"exact phrase"``, ``-exclude``, ``or``). Each result carries its
+    ``score`` and, for geo searches, ``distance_km``.
+    """
+
+    http_method_names = ['get']
+    renderer_classes = [ORJSONRenderer, BrowsableAPIRenderer]
+
+    def get(self, request):
+        text = request.query_params.get('q', '').strip()
+        if not text:
+            raise ValidationError({'q': 'This parameter is required.'})
+        limit = max(1, min(_int_param(request, 'limit') or 30, settings.NEARBY_MAX_LIMIT))
+        lat, lng = _float_param(request, 'lat'), _float_param(request, 'lng')
+        if (lat is None) != (lng is None):
+            raise ValidationError({'detail': 'lat and lng must be given together.'})
+        if lat is None:
+            products, extra = ProductService.search(text, limit=limit), ('score',)
+        else:
+            radius = _float_param(request, 'radius') or 5
+            products = ProductService.search(text, lat, lng, radius_km=radius, limit=limit)
+            extra = ('score', 'distance_km')
+        rows = products.values(*PRODUCT_COLUMNS, *extra)
+        return Response([{**product_representation(row), **{k: row[k] for k in extra}} for row in rows])
+
+
+class ProductAutocompleteView(TaggedCacheMixin, APIView):
+    """Product names starting with ``prefix``; answers are cached until a product changes."""
+
+    http_method_names = ['get']
+    renderer_classes = [ORJSONRenderer]
+    cache_namespace = 'autocomplete'
+
+    def get(self, request):
+        prefix = request.query_params.get('prefix', '').strip()
+        if not 0 < len(prefix) <= 64:
+            raise ValidationError({'prefix': 'Between 1 and 64 characters are required.'})
+        limit = max(1, min(_int_param(request, 'limit') or 10, settings.AUTOCOMPLETE_MAX_LIMIT))
+
+        def load():
+            return ProductService.autocomplete(prefix, limit), ()
+
+        return self._cached_response(request, load, (PRODUCTS_TAG,), prefix.casefold(), limit)
+
+
+def _date_param(request, name):
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ValidationError({name: 'Expected an ISO date (YYYY-MM-DD).'})
+
+
+def _int_param(request, name):
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValidationError({name: 'Must be an integer.'})
+
+
+def _float_param(request, name):
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        raise ValidationError({name: 'Must be a number.'})
+
+
+class OrderAnalyticsView(APIView):
+    """Top-selling product per merchant, read from the ``DailySales`` rollup.
+
+    Optional ``start`` / ``end`` (inclusive ISO dates) and ``merchant`` narrow the rollup rows scanned.
+    """
+
+    http_method_names = ['get']
+
+    def get(self, request):
+        rows = SalesRollupService.top_products(
+            start=_date_param(request, 'start'),
+            end=_date_param(request, 'end'),
+            merchant_pk=_int_param(request, 'merchant'),
         )
-        if pname:
-            qs = qs.filter(name__icontains=pname)
-        qs = (
-            qs.annotate(distance=Distance('merchant__address__location', user_point))
-            .select_related('merchant', 'category')
-            .order_by('distance')[0:30]
+        return Response(
+            [
+                {
+                    'product__id': row['product__id'],
+                    'product__name': row['product__name'],
+                    'order__merchant__id': row['merchant__id'],
+                    'order__merchant__name': row['merchant__name'],
+                    'total_sales': row['total_sales'],
+                    'rank': row['rank'],
+                }
+                for row in rows
+            ]
         )
-        res = ProductSerializer(qs, many=True).data
-        set_cached_product_search(lat, lng, radius, pname, res)
-        return Response(res)
 
 
-class OrderAnalyticsView(APIView):
+class OrderExportView(APIView):
+    """Stream every matching order as NDJSON (one order per line) or CSV (one item per row).
+
+    Rows come from a server-side cursor and are written as they are read, so memory stays flat
+    regardless of the export size. Filters: ``merchant``, ``status``, ``start`` / ``end`` (inclusive dates).
+    """
+
+    permission_classes = [IsAdminUser]
     http_method_names = ['get']
 
     def get(self, request):
-        qs = (
-            OrderItem.objects.values('product__id', 'product__name', 'order__merchant__id', 'order__merchant__name')
-            .annotate(total_sales=Sum('line_total'))
-            .annotate(
-                rank=Window(
-                    expression=Rank(), partition_by=[F('order__merchant__id')], order_by=F('total_sales').desc()
-                )
-            )
-            .filter(rank=1)
+        output = request.query_params.get('output', 'ndjson')
+        if output not in EXPORT_FORMATS:
+            raise ValidationError({'output': f'Expected one of: {", ".join(EXPORT_FORMATS)}.'})
+        rows = order_export_rows(
+            merchant_pk=_int_param(request, 'merchant'),
+            status=request.query_params.get('status') or None,
+            start=_date_param(request, 'start'),
+            end=_date_param(request, 'end'),
         )
-        return Response(list(qs))
+        response = StreamingHttpResponse(iter_export(output, rows), content_type=EXPORT_FORMATS[output])
+        response['Content-Disposition'] = f'attachment; filename="orders.{output}"'
+        return response
 
 
-class DeliveryETAView(APIView):
-    def post(self, request):
-        order_ids = request.data.get('order_ids', [])
-        result = asyncio.run(DeliveryService.get_eta_for_orders(order_ids))
-        return Response(result)
+@method_decorator(csrf_exempt, name='dispatch')
+class DeliveryETAView(View):
+    """Native async ETA lookup; runs on the event loop under ``config.asgi`` instead of blocking a worker.
+
+    CSRF is enforced by DRF's ``SessionAuthentication`` for session users, as on the other API views.
+    """
+
+    http_method_names = ['post']
+
+    async def post(self, request):
+        try:
+            await sync_to_async(self._authenticate)(request)
+        except APIException as e:
+            return JsonResponse({'detail': str(e.detail)}, status=e.status_code)
+        try:
+            order_ids = [int(oid) for oid in json.loads(request.body or b'{}').get('order_ids', [])]
+        except (AttributeError, TypeError, ValueError):
+            return JsonResponse({'detail': 'order_ids must be a list of integers.'}, status=400)
+        if len(order_ids) > settings.ETA_MAX_ORDERS:
+            return JsonResponse({'detail': f'At most {settings.ETA_MAX_ORDERS} order_ids per request.'}, status=400)
+        result = await DeliveryService.get_eta_for_orders(order_ids)
+        return JsonResponse(result, safe=False)
+
+    @staticmethod
+    def _authenticate(request):
+        drf_request = Request(request, authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES])
+        if not drf_request.user.is_authenticated:
+            raise NotAuthenticated()
 
 
 class PriorityAssignmentView(APIView):
@@ -175,31 +571,68 @@ class PriorityAssignmentView(APIView):
 
     def post(self, request):
         order_id = request.data.get('order_id')
-        courier_locations = request.data.get('courier_locations', [])
+        courier_locations = request.data.get('courier_locations')
         try:
             order = Order.objects.select_related('merchant__address').get(pk=order_id)
         except Order.DoesNotExist:
             return Response({'detail': 'Order not found'}, status=404)
         m_loc = order.merchant.address.location
-        scored = []
-        for c in courier_locations:
-            c_point = Point(c['lng'], c['lat'], srid=4326)
-            dist = m_loc.distance(c_point)
-            scored.append({'courier_id': c['id'], 'score': dist})
-        assigned = sorted(scored, key=lambda x: x['score'])[0] if scored else None
-        return Response({'assigned': assigned})
+        try:
+            if courier_locations is None:
+                radius = float(request.data.get('radius', settings.COURIER_SEARCH_RADIUS_KM))
+                courier_locations = get_courier_store().within(m_loc.y, m_loc.x, radius)
+            k = max(1, min(int(request.data.get('k', 1)), settings.COURIER_MAX_CANDIDATES))
+            ranked = rank_couriers(m_loc.y, m_loc.x, courier_locations, k=k, weights=request.data.get('weights'))
+        except (KeyError, TypeError, ValueError) as e:
+            return Response({'detail': f'Invalid courier payload: {e}'}, status=400)
+        return Response({'assigned': ranked[0] if ranked else None, 'candidates': ranked})
+
+
+class CourierLocationIngestView(APIView):
+    """Batched courier location pings, written to the live courier store in one round trip."""
+
+    permission_classes = [IsAuthenticated]
+    http_method_names = ['post']
+
+    def post(self, request):
+        payload = request.data.get('pings') if isinstance(request.data, dict) else request.data
+        if not isinstance(payload, list):
+            return Response({'detail': 'pings must be a list.'}, status=400)
+        if len(payload) > settings.COURIER_PING_MAX_BATCH:
+            return Response({'detail': f'At most {settings.COURIER_PING_MAX_BATCH} pings per request.'}, status=400)
+        pings, errors = parse_pings(payload)
+        get_courier_store().update_many(pings)
+        return Response({'accepted': len(pings), 'rejected': errors}, status=status.HTTP_202_ACCEPTED)
 
 
 class ProductsInZoneView(APIView):
+    """Published products of every merchant serving a zone, read from the precomputed membership index.
+
+    The body is a list of products; the next page is linked from the ``Link`` header with an opaque
+    keyset cursor, so deep pages cost the same as the first one.
+    """
+
     permission_classes = [AllowAny]
     http_method_names = ['get']
 
     def get(self, request):
-        zone_id = request.query_params.get('zone_id')
-        if not zone_id:
+        zone_id = _int_param(request, 'zone_id')
+        if zone_id is None:
             return Response({'detail': 'zone_id is required.'}, status=400)
-        try:
-            _zone = DeliveryZone.objects.get(pk=zone_id)
-        except DeliveryZone.DoesNotExist:
+        if not DeliveryZone.objects.filter(pk=zone_id).exists():
             return Response({'detail': 'Delivery zone not found.'}, status=404)
-        return Response([], status=200)
+        cursor = request.query_params.get('cursor')
+        try:
+            after = int(decode_cursor(cursor)[0]) if cursor else None
+        except (TypeError, ValueError):
+            raise ValidationError({'cursor': 'Invalid cursor.'})
+        page_size = settings.ZONE_PRODUCTS_PAGE_SIZE
+        # One extra row tells whether a next page exists, so the last page carries no link.
+        products = DeliveryZoneService.products_in_zone(zone_id, after=after, limit=page_size + 1)
+        has_next = len(products) > page_size
+        products = products[:page_size]
+        response = Response(ProductSerializer(products, many=True).data, status=200)
+        if has_next:
+            next_url = replace_query_param(request.build_absolute_uri(), 'cursor', encode_cursor([products[-1].pk]))
+            response['Link'] = f'<{next_url}>; rel="next"'
+        return response
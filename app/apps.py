@@ -5,3 +5,6 @@ class AppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'app'
     verbose_name = 'Main Application'
+
+    def ready(self):
+        from app import signals  # noqa: F401
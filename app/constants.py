@@ -9,3 +9,19 @@ ORDER_STATUSES = [
     (ORDER_STATUS_FULFILLED, 'Fulfilled'),
     (ORDER_STATUS_CANCELLED, 'Cancelled'),
 ]
+
+RESERVATION_STATUS_HELD = 'held'
+RESERVATION_STATUS_CONVERTED = 'converted'
+RESERVATION_STATUS_RELEASED = 'released'
+RESERVATION_STATUS_EXPIRED = 'expired'
+
+RESERVATION_STATUSES = [
+    (RESERVATION_STATUS_HELD, 'Held'),
+    (RESERVATION_STATUS_CONVERTED, 'Converted'),
+    (RESERVATION_STATUS_RELEASED, 'Released'),
+    (RESERVATION_STATUS_EXPIRED, 'Expired'),
+]
+
+# Text search configuration of Product.search_vector. Migration 0011 builds its trigger from this value, so
+# changing it later needs a migration that recreates the trigger and refreshes the vectors.
+SEARCH_CONFIG = 'english'
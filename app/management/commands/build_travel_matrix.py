@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from app.models import DeliveryZone
+from app.utils.travel_matrix import build_travel_matrix
+
+
+class Command(BaseCommand):
+    help = 'Precompute the cell-to-cell travel-time matrix covering all delivery zones.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', help='Output directory (defaults to TRAVEL_MATRIX_DIR).')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        areas = [zone.area for zone in DeliveryZone.objects.only('area')]
+        cells = build_travel_matrix(areas, options['path'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Built {cells}x{cells} travel matrix in {time.monotonic() - started:.1f}s')
+        )
@@ -0,0 +1,28 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from app.utils.export import EXPORT_FORMATS, iter_export, order_export_rows
+
+
+class Command(BaseCommand):
+    help = 'Stream orders and their items as NDJSON or CSV without loading them into memory.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=list(EXPORT_FORMATS), default='ndjson')
+        parser.add_argument('--merchant', type=int)
+        parser.add_argument('--status')
+        parser.add_argument('--start', type=date.fromisoformat, help='First day (inclusive), YYYY-MM-DD.')
+        parser.add_argument('--end', type=date.fromisoformat, help='Last day (inclusive), YYYY-MM-DD.')
+        parser.add_argument('--output', help='File to write (defaults to stdout).')
+
+    def handle(self, *args, **options):
+        rows = order_export_rows(
+            merchant_pk=options['merchant'], status=options['status'], start=options['start'], end=options['end']
+        )
+        if not options['output']:
+            for chunk in iter_export(options['format'], rows):
+                self.stdout.write(chunk, ending='')
+            return
+        with open(options['output'], 'w', newline='') as out:
+            out.writelines(iter_export(options['format'], rows))
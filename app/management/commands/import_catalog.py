@@ -0,0 +1,31 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from app.utils.catalog_import import import_catalog_file
+
+
+class Command(BaseCommand):
+    help = "Bulk-load a merchant's products from CSV or NDJSON through COPY and a set-based merge."
+
+    def add_arguments(self, parser):
+        parser.add_argument('merchant', type=int)
+        parser.add_argument('path', help='CSV with a header row, or NDJSON (.ndjson/.jsonl).')
+        parser.add_argument('--format', choices=['csv', 'ndjson'], help='Defaults to the file extension.')
+        parser.add_argument('--chunk-rows', type=int, help='Rows per COPY/merge transaction.')
+        parser.add_argument(
+            '--no-create-categories', action='store_true', help='Reject rows whose category does not exist.'
+        )
+
+    def handle(self, *args, **options):
+        report = import_catalog_file(
+            options['merchant'],
+            options['path'],
+            fmt=options['format'],
+            chunk_rows=options['chunk_rows'],
+            create_categories=not options['no_create_categories'],
+        )
+        for reject in report['rejects']:
+            self.stderr.write(f'line {reject["line"]}: {reject["error"]}')
+        del report['rejects']
+        self.stdout.write(json.dumps(report))
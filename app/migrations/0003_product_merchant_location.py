@@ -0,0 +1,29 @@
+# Generated by Django 4.2.26 on 2026-10-17 09:12
+
+import django.contrib.gis.db.models.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0002_alter_address_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='merchant_location',
+            field=django.contrib.gis.db.models.fields.PointField(editable=False, geography=True, null=True, srid=4326),
+        ),
+        migrations.RunSQL(
+            sql="""
+                UPDATE app_product p
+                SET merchant_location = a.location::geography
+                FROM app_merchant m
+                JOIN app_address a ON a.id = m.address_id
+                WHERE p.merchant_id = m.id
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
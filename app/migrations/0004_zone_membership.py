@@ -0,0 +1,47 @@
+# Generated by Django 4.2.26 on 2026-10-17 10:03
+
+import django.contrib.gis.db.models.fields
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0003_product_merchant_location'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeliveryZonePart',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('area', django.contrib.gis.db.models.fields.GeometryField(srid=4326)),
+                ('zone', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='parts', to='app.deliveryzone')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ZoneProduct',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('merchant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='zone_product_memberships', to='app.merchant')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='zone_memberships', to='app.product')),
+                ('zone', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='product_memberships', to='app.deliveryzone')),
+            ],
+            options={
+                'unique_together': {('zone', 'product')},
+            },
+        ),
+        migrations.RunSQL(
+            sql="""
+                INSERT INTO app_deliveryzonepart (zone_id, area)
+                SELECT id, ST_Subdivide(area, 64) FROM app_deliveryzone;
+                INSERT INTO app_zoneproduct (zone_id, product_id, merchant_id)
+                SELECT mz.deliveryzone_id, p.id, p.merchant_id
+                FROM app_merchant_delivery_zones mz
+                JOIN app_product p ON p.merchant_id = mz.merchant_id
+                WHERE p.is_published;
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.26 on 2026-10-17 10:41
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0004_zone_membership'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='deliveryzone',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.26 on 2026-10-17 11:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0005_deliveryzone_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='merchant',
+            name='prep_minutes',
+            field=models.PositiveSmallIntegerField(default=10),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.26 on 2026-10-17 12:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0006_merchant_prep_minutes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('quantity', models.PositiveBigIntegerField(default=0)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                (
+                    'merchant',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='app.merchant'
+                    ),
+                ),
+                (
+                    'product',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='app.product'
+                    ),
+                ),
+            ],
+            options={
+                'unique_together': {('day', 'merchant', 'product')},
+                'indexes': [models.Index(fields=['merchant', 'day'], name='app_dailysa_merchan_c44b01_idx')],
+            },
+        ),
+    ]
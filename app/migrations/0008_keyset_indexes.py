@@ -0,0 +1,24 @@
+# Generated by Django 4.2.26 on 2026-10-17 12:40
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Built concurrently so large order/product tables stay writable while the indexes are created.
+    atomic = False
+
+    dependencies = [
+        ('app', '0007_dailysales'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='product',
+            index=models.Index(fields=['created_at', 'id'], name='app_product_created_532f93_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='order',
+            index=models.Index(fields=['created_at', 'id'], name='app_order_created_5c3320_idx'),
+        ),
+    ]
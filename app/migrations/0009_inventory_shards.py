@@ -0,0 +1,36 @@
+# Generated by Django 4.2.26 on 2026-10-17 23:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0008_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventory',
+            name='shard_count',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='InventoryShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('slot', models.PositiveSmallIntegerField()),
+                ('stock', models.PositiveIntegerField()),
+                (
+                    'inventory',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, related_name='shards', to='app.inventory'
+                    ),
+                ),
+            ],
+            options={
+                'unique_together': {('inventory', 'slot')},
+            },
+        ),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 4.2.26 on 2026-10-18 00:10
+
+import uuid
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('app', '0009_inventory_shards'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockReservation',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                (
+                    'status',
+                    models.CharField(
+                        choices=[
+                            ('held', 'Held'),
+                            ('converted', 'Converted'),
+                            ('released', 'Released'),
+                            ('expired', 'Expired'),
+                        ],
+                        default='held',
+                        max_length=16,
+                    ),
+                ),
+                ('expires_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                (
+                    'user',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='stock_reservations',
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                'indexes': [
+                    models.Index(
+                        condition=models.Q(('status', 'held')), fields=['expires_at'], name='reservation_held_idx'
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockReservationItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField()),
+                (
+                    'product',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='reservation_items',
+                        to='app.product',
+                    ),
+                ),
+                (
+                    'reservation',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, related_name='items', to='app.stockreservation'
+                    ),
+                ),
+            ],
+        ),
+    ]
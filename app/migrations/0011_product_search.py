@@ -0,0 +1,100 @@
+# Generated by Django 4.2.26 on 2026-10-18 00:40
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+import django.db.models.functions.text
+from django.contrib.postgres.operations import AddIndexConcurrently, TrigramExtension
+from django.db import migrations, models
+
+from app.constants import SEARCH_CONFIG
+
+BACKFILL_BATCH_SIZE = 5000
+
+
+def search_vector_sql(row=''):
+    """Weighted name/description vector in ``SEARCH_CONFIG``; ``row`` prefixes the columns (e.g. ``NEW.``)."""
+    return (
+        f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce({row}name, '')), 'A') || "
+        f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce({row}description, '')), 'B')"
+    )
+
+
+SEARCH_VECTOR_TRIGGER = f"""
+CREATE FUNCTION app_product_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := {search_vector_sql('NEW.')};
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER app_product_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF name, description ON app_product
+    FOR EACH ROW EXECUTE FUNCTION app_product_search_vector_update();
+"""
+
+DROP_SEARCH_VECTOR_TRIGGER = """
+DROP TRIGGER app_product_search_vector_trigger ON app_product;
+DROP FUNCTION app_product_search_vector_update();
+"""
+
+
+def backfill_search_vector(apps, schema_editor):
+    """Fill ``search_vector`` for existing rows in pk-range batches.
+
+    The migration is not atomic, so each batch commits on its own and only locks its own rows. Rows
+    written meanwhile already get their vector from the trigger.
+    """
+    table = apps.get_model('app', 'Product')._meta.db_table
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'SELECT min(id), max(id) FROM {table}')
+        low, high = cursor.fetchone()
+        if low is None:
+            return
+        for start in range(low, high + 1, BACKFILL_BATCH_SIZE):
+            cursor.execute(
+                f'UPDATE {table} SET search_vector = {search_vector_sql()} WHERE id >= %s AND id < %s',
+                [start, start + BACKFILL_BATCH_SIZE],
+            )
+
+
+class Migration(migrations.Migration):
+    # Not atomic so the backfill commits batch by batch and the indexes are built concurrently,
+    # keeping the product table writable throughout, as in 0008.
+    atomic = False
+
+    dependencies = [
+        ('app', '0010_stock_reservations'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(SEARCH_VECTOR_TRIGGER, DROP_SEARCH_VECTOR_TRIGGER),
+        migrations.RunPython(backfill_search_vector, migrations.RunPython.noop),
+        AddIndexConcurrently(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='product_search_vector_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper('name'), name='gin_trgm_ops'
+                ),
+                name='product_name_trgm_idx',
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name='product',
+            index=models.Index(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper('name'), name='text_pattern_ops'
+                ),
+                name='product_name_prefix_idx',
+            ),
+        ),
+    ]
@@ -1,8 +1,18 @@
+import uuid
+
 from django.contrib.auth import get_user_model
 from django.contrib.gis.db import models as gis_models
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models.functions import Upper
 
-from app.constants import ORDER_STATUS_PENDING, ORDER_STATUSES
+from app.constants import (
+    ORDER_STATUS_PENDING,
+    ORDER_STATUSES,
+    RESERVATION_STATUS_HELD,
+    RESERVATION_STATUSES,
+)
 
 User = get_user_model()
 
@@ -10,6 +20,7 @@ User = get_user_model()
 class DeliveryZone(models.Model):
     name = models.CharField(max_length=120)
     area = gis_models.PolygonField(srid=4326)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         indexes = [
@@ -24,6 +35,13 @@ class DeliveryZone(models.Model):
         return self.name
 
 
+class DeliveryZonePart(models.Model):
+    """Piece of a subdivided ``DeliveryZone.area`` so containment checks touch few vertices."""
+
+    zone = models.ForeignKey(DeliveryZone, on_delete=models.CASCADE, related_name='parts')
+    area = gis_models.GeometryField(srid=4326)
+
+
 class Address(models.Model):
     line1 = models.CharField(max_length=255)
     line2 = models.CharField(max_length=255, blank=True, default='')
@@ -46,6 +64,7 @@ class Merchant(models.Model):
     address = models.OneToOneField(Address, on_delete=models.CASCADE, related_name='merchant')
     categories = models.ManyToManyField('ProductCategory', related_name='merchants')
     delivery_zones = models.ManyToManyField(DeliveryZone, related_name='merchants')
+    prep_minutes = models.PositiveSmallIntegerField(default=10)
 
     def __str__(self):
         return self.name
@@ -66,27 +85,60 @@ class Product(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2)
     is_published = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Copy of merchant.address.location for index-assisted KNN search; kept in sync by app.signals.
+    merchant_location = gis_models.PointField(geography=True, srid=4326, null=True, editable=False)
+    # Weighted name (A) and description (B) document for full-text search, maintained by a database
+    # trigger (migration 0011) so bulk loads and queryset updates keep it current too.
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         unique_together = ('name', 'merchant', 'category')
         indexes = [
             models.Index(fields=['merchant', 'category']),
+            models.Index(fields=['created_at', 'id']),
+            GinIndex(fields=['search_vector'], name='product_search_vector_idx'),
+            # UPPER(name) matches how Django compiles icontains/istartswith, so those lookups use these too.
+            GinIndex(OpClass(Upper('name'), name='gin_trgm_ops'), name='product_name_trgm_idx'),
+            models.Index(OpClass(Upper('name'), name='text_pattern_ops'), name='product_name_prefix_idx'),
         ]
 
     def __str__(self):
         return self.name
 
 
+class ZoneProduct(models.Model):
+    """Precomputed membership of published products in the zones their merchant serves."""
+
+    zone = models.ForeignKey(DeliveryZone, on_delete=models.CASCADE, related_name='product_memberships')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='zone_memberships')
+    merchant = models.ForeignKey(Merchant, on_delete=models.CASCADE, related_name='zone_product_memberships')
+
+    class Meta:
+        unique_together = ('zone', 'product')
+
+
 class Inventory(models.Model):
     merchant = models.ForeignKey(Merchant, on_delete=models.CASCADE, related_name='inventories')
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='inventories')
     stock = models.PositiveIntegerField()
+    # Hot-SKU mode when > 0: available stock lives in that many InventoryShard rows and ``stock`` is
+    # their total as of the last InventoryService.reconcile_hot_stock run.
+    shard_count = models.PositiveSmallIntegerField(default=0)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ('merchant', 'product')
 
 
+class InventoryShard(models.Model):
+    inventory = models.ForeignKey(Inventory, on_delete=models.CASCADE, related_name='shards')
+    slot = models.PositiveSmallIntegerField()
+    stock = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ('inventory', 'slot')
+
+
 class Order(models.Model):
     status = models.CharField(max_length=16, choices=ORDER_STATUSES, default=ORDER_STATUS_PENDING)
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='orders')
@@ -96,6 +148,9 @@ class Order(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [models.Index(fields=['created_at', 'id'])]
+
     def __str__(self):
         return f'Order {self.pk} by {self.user} ({self.status})'
 
@@ -109,3 +164,40 @@ class OrderItem(models.Model):
 
     def __str__(self):
         return f'{self.product} x {self.quantity}'
+
+
+class StockReservation(models.Model):
+    """Stock taken out of inventory for a buyer until ``expires_at``; see ``ReservationService``."""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='stock_reservations')
+    status = models.CharField(max_length=16, choices=RESERVATION_STATUSES, default=RESERVATION_STATUS_HELD)
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['expires_at'], condition=models.Q(status=RESERVATION_STATUS_HELD), name='reservation_held_idx'
+            )
+        ]
+
+
+class StockReservationItem(models.Model):
+    reservation = models.ForeignKey(StockReservation, on_delete=models.CASCADE, related_name='items')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='reservation_items')
+    quantity = models.PositiveIntegerField()
+
+
+class DailySales(models.Model):
+    """Per-day sales of a product, kept in step with ``OrderItem`` by ``SalesRollupService``."""
+
+    day = models.DateField()
+    merchant = models.ForeignKey(Merchant, on_delete=models.CASCADE, related_name='daily_sales')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='daily_sales')
+    quantity = models.PositiveBigIntegerField(default=0)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = ('day', 'merchant', 'product')
+        indexes = [models.Index(fields=['merchant', 'day'])]
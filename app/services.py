@@ -1,11 +1,45 @@
-import asyncio
+import random
+from datetime import timedelta
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db import transaction
-from django.db.models import F
+from django.contrib.gis.db.models.functions import Distance
+from django.contrib.gis.geos import Point
+from django.contrib.gis.measure import D
+from django.contrib.postgres.expressions import ArraySubquery
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection, transaction
+from django.db.models import BooleanField, Case, Exists, F, FloatField, OuterRef, Q, Sum, When, Window
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Rank, Upper
+from django.utils import timezone
 
-from app.constants import ORDER_STATUS_PENDING
-from app.models import Inventory, Merchant, Order, OrderItem, Product
+from app.constants import (
+    ORDER_STATUS_PENDING,
+    RESERVATION_STATUS_CONVERTED,
+    RESERVATION_STATUS_EXPIRED,
+    RESERVATION_STATUS_HELD,
+    RESERVATION_STATUS_RELEASED,
+    SEARCH_CONFIG,
+)
+from app.models import (
+    DailySales,
+    DeliveryZone,
+    DeliveryZonePart,
+    Inventory,
+    InventoryShard,
+    Merchant,
+    Order,
+    OrderItem,
+    Product,
+    ProductCategory,
+    StockReservation,
+    StockReservationItem,
+    ZoneProduct,
+)
+from app.utils.cache import INVENTORIES_TAG, invalidate_tags, product_tag
+from app.utils.eta import eta_client
+from app.utils.zone_index import zone_index
 
 User = get_user_model()
 
@@ -24,6 +58,31 @@ class MerchantService:
     def get_merchant(pk):
         return Merchant.objects.select_related('address').prefetch_related('categories', 'delivery_zones').get(pk=pk)
 
+    @staticmethod
+    def nearby_deliverers(lat, lng, after=None, limit=20):
+        """Merchants with a delivery zone covering the point, nearest first, as slim ``values()`` rows.
+
+        Coverage is an ``EXISTS`` over the subdivided zone parts (GiST on ``area``), which bounds the
+        candidates to the merchants serving the point before they are sorted. Ordering is by the same
+        great-circle ``distance`` the rows carry (a ``Distance`` measure), with ``id`` breaking ties, and
+        category names come from an array subquery, so one query answers a page. Pass the last row's
+        ``(distance in metres, id)`` as ``after`` for the next page.
+        """
+        point = Point(lng, lat, srid=4326)
+        covering = DeliveryZonePart.objects.filter(area__intersects=point).values('zone_id')
+        serves = Merchant.delivery_zones.through.objects.filter(
+            merchant_id=OuterRef('pk'), deliveryzone_id__in=covering
+        )
+        categories = ProductCategory.objects.filter(merchants=OuterRef('pk')).order_by('name').values('name')
+        qs = Merchant.objects.filter(Exists(serves)).annotate(
+            distance=Distance('address__location', point), category_names=ArraySubquery(categories)
+        )
+        if after is not None:
+            # (distance, id) > after, expanded into Q terms since distance is computed, not indexed.
+            distance, pk = after
+            qs = qs.filter(Q(distance__gt=D(m=distance)) | Q(distance=D(m=distance), pk__gt=pk))
+        return list(qs.order_by('distance', 'pk').values('id', 'name', 'category_names', 'distance')[:limit])
+
 
 class ProductService:
     @staticmethod
@@ -32,6 +91,131 @@ class ProductService:
             merchant=merchant, name=name, category=category, price=price, description=description
         )
 
+    @staticmethod
+    def resolve_lines(lines):
+        """Turn ``[(product_id, quantity), ...]`` into ``[(Product, quantity), ...]`` with one query."""
+        products = Product.objects.in_bulk({pid for pid, _ in lines})
+        missing = sorted({pid for pid, _ in lines} - products.keys())
+        if missing:
+            raise ValueError(f'Unknown products: {missing}')
+        return [(products[pid], qty) for pid, qty in lines]
+
+    @staticmethod
+    def nearest(lat, lng, radius_km, limit, pname=None):
+        """Nearest ``limit`` published products within ``radius_km``, ordered by the GiST-assisted ``<->`` operator.
+
+        The index scan stops after ``limit`` rows, so cost is bounded by N rather than by merchant density.
+        """
+        point = Point(lng, lat, srid=4326)
+        qs = Product.objects.filter(is_published=True, merchant_location__dwithin=(point, D(km=radius_km)))
+        if pname:
+            qs = qs.filter(name__icontains=pname)
+        knn = RawSQL('"app_product"."merchant_location" <-> %s::geography', (point.ewkt,))
+        return qs.order_by(knn.asc())[:limit]
+
+    @staticmethod
+    def search(text, lat=None, lng=None, radius_km=None, limit=30):
+        """Published products matching ``text``, best first, optionally within ``radius_km`` of a point.
+
+        A product matches on full text (web-search syntax over the weighted name/description vector)
+        or, to tolerate typos, on trigram word similarity of its name. Both predicates and the radius
+        are served by indexes in the same query. Rows are annotated with ``score`` (text rank plus name
+        similarity) and, given a point, ``distance_km``, which breaks ties.
+        """
+        query = SearchQuery(text, search_type='websearch', config=SEARCH_CONFIG)
+        similarity = RawSQL(
+            'word_similarity(UPPER(%s), UPPER("app_product"."name"))', (text,), output_field=FloatField()
+        )
+        fuzzy = RawSQL('UPPER(%s) <%% UPPER("app_product"."name")', (text,), output_field=BooleanField())
+        qs = Product.objects.filter(Q(search_vector=query) | Q(fuzzy), is_published=True).annotate(
+            score=SearchRank(F('search_vector'), query) + similarity
+        )
+        if lat is None or lng is None:
+            return qs.order_by('-score', 'pk')[:limit]
+        point = Point(lng, lat, srid=4326)
+        distance = RawSQL(
+            'ST_Distance("app_product"."merchant_location", %s::geography) / 1000', (point.ewkt,), FloatField()
+        )
+        qs = qs.filter(merchant_location__dwithin=(point, D(km=radius_km))).annotate(distance_km=distance)
+        return qs.order_by('-score', 'distance_km')[:limit]
+
+    @staticmethod
+    def nearby_facets(lat, lng, radius_km, limit, pname=None, price_buckets=None):
+        """Nearest ``limit`` published products within ``radius_km`` plus facets of every match, in one query.
+
+        The matches are scanned once in a CTE; the top rows come from it by distance and the facets
+        from a single ``GROUPING SETS`` aggregate over it: per-category product and merchant counts,
+        an equal-width price histogram between the cheapest and dearest match, and overall totals.
+        Returns ``(products, facets)``; product rows carry the ``Product`` columns and ``distance_km``.
+        """
+        buckets = price_buckets or settings.NEARBY_FACETS_PRICE_BUCKETS
+        products, categories = Product._meta.db_table, ProductCategory._meta.db_table
+        params = {
+            'point': Point(lng, lat, srid=4326).ewkt,
+            'radius': radius_km * 1000,
+            'buckets': buckets,
+            'limit': limit,
+        }
+        name_filter = ''
+        if pname:
+            name_filter = 'AND UPPER(p.name) LIKE UPPER(%(pattern)s)'
+            params['pattern'] = f'%{connection.ops.prep_for_like_query(pname)}%'
+        columns = ('id', 'name', 'description', 'category_id', 'merchant_id', 'price', 'is_published', 'created_at')
+        # Rows are tagged by kind: 0 for products, else GROUPING(): 1 per category, 2 per price bucket, 3 totals.
+        sql = (
+            'WITH hits AS MATERIALIZED ('
+            f'SELECT {", ".join(f"p.{c}" for c in columns)}, '
+            'ST_Distance(p.merchant_location, %(point)s::geography) / 1000 AS distance_km '
+            f'FROM {products} p WHERE p.is_published '
+            f'AND ST_DWithin(p.merchant_location, %(point)s::geography, %(radius)s) {name_filter}), '
+            'bounds AS (SELECT MIN(price) AS lo, MAX(price) AS hi FROM hits), '
+            'facets AS ('
+            'SELECT h.category_id, h.merchant_id, h.price, c.name AS category_name, CASE WHEN b.hi > b.lo '
+            'THEN LEAST(width_bucket(h.price, b.lo, b.hi, %(buckets)s), %(buckets)s) ELSE 1 END AS bucket '
+            f'FROM hits h CROSS JOIN bounds b JOIN {categories} c ON c.id = h.category_id) '
+            f'(SELECT 0 AS kind, {", ".join(columns)}, distance_km, '
+            'NULL::int, NULL::bigint, NULL::bigint, NULL::numeric, NULL::numeric '
+            'FROM hits ORDER BY distance_km, id LIMIT %(limit)s) '
+            'UNION ALL '
+            'SELECT GROUPING(category_id, bucket), NULL, MIN(category_name), NULL, category_id, NULL, NULL, NULL, '
+            'NULL, NULL, bucket, COUNT(*), COUNT(DISTINCT merchant_id), MIN(price), MAX(price) '
+            'FROM facets GROUP BY GROUPING SETS ((category_id), (bucket), ())'
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+        top = [dict(zip((*columns, 'distance_km'), row[1:10])) for row in rows if row[0] == 0]
+        facets = {'total': 0, 'merchants': 0, 'categories': [], 'price': []}
+        histogram = {}
+        for row in rows:
+            kind, (bucket, count, merchants, lo, hi) = row[0], row[10:]
+            if kind == 1:
+                facets['categories'].append({'id': row[4], 'name': row[2], 'count': count, 'merchants': merchants})
+            elif kind == 2:
+                histogram[bucket] = count
+            elif kind == 3:
+                facets.update(total=count, merchants=merchants, price_min=lo, price_max=hi)
+        facets['categories'].sort(key=lambda c: (-c['count'], c['name']))
+        if histogram:
+            lo, hi = facets['price_min'], facets['price_max']
+            width = (hi - lo) / buckets
+            facets['price'] = [
+                {'min': lo + width * (b - 1), 'max': hi if b == buckets else lo + width * b, 'count': count}
+                for b, count in sorted(histogram.items())
+            ]
+        return top, facets
+
+    @staticmethod
+    def autocomplete(prefix, limit=10):
+        """Distinct published product names starting with ``prefix`` (case-insensitive), via the prefix index."""
+        names = (
+            Product.objects.filter(is_published=True, name__istartswith=prefix)
+            .order_by(Upper('name'), 'name')
+            .values_list('name', flat=True)
+            .distinct()
+        )
+        return list(names[:limit])
+
     @staticmethod
     def publish_product(product: Product):
         product.is_published = True
@@ -47,64 +231,620 @@ class ProductService:
 
 class InventoryService:
     @staticmethod
+    @transaction.atomic
     def set_stock(merchant, product, quantity):
         inv, _ = Inventory.objects.get_or_create(merchant=merchant, product=product, defaults={'stock': 0})
+        inv = Inventory.objects.select_for_update().get(pk=inv.pk)
         inv.stock = quantity
+        if inv.shard_count:
+            InventoryService._reshard(inv, inv.shard_count)
+            return inv
         inv.save()
         return inv
 
     @staticmethod
-    @transaction.atomic
     def decrement_stock_atomic(merchant, product, quantity):
-        inv = Inventory.objects.select_for_update().get(merchant=merchant, product=product)
-        if inv.stock < quantity:
-            raise ValueError('Insufficient stock')
-        inv.stock = F('stock') - quantity
-        inv.save()
-        inv.refresh_from_db()
-        return inv
+        """Decrement one SKU; for hot SKUs the returned ``stock`` is the last reconciled total."""
+        InventoryService.decrement_stock_many({(merchant.pk, product.pk): quantity})
+        return Inventory.objects.get(merchant=merchant, product=product)
+
+    @staticmethod
+    def _reshard(inventory, shards):
+        """Spread ``inventory.stock`` evenly over slots ``0..shards-1`` (none disables hot mode).
+
+        The caller must hold the inventory row lock (``select_for_update``) in its transaction. Hot
+        checkouts key-share that row while they touch shards (see ``_hold_hot``), so none is in flight,
+        and those queued behind the lock see the new layout. Shards are updated in place, missing slots
+        are added and surplus ones deleted.
+        """
+        held = {
+            shard.slot: shard
+            for shard in InventoryShard.objects.select_for_update().filter(inventory=inventory).order_by('slot')
+        }
+        base, extra = divmod(inventory.stock, shards or 1)
+        target = {slot: base + (slot < extra) for slot in range(shards)}
+        changed = []
+        for slot, shard in held.items():
+            if slot in target and shard.stock != target[slot]:
+                shard.stock = target[slot]
+                changed.append(shard)
+        InventoryShard.objects.bulk_update(changed, ['stock'])
+        if len(held) > shards:
+            InventoryShard.objects.filter(inventory=inventory, slot__gte=shards).delete()
+        InventoryShard.objects.bulk_create(
+            [InventoryShard(inventory=inventory, slot=slot, stock=n) for slot, n in target.items() if slot not in held]
+        )
+        inventory.shard_count = shards
+        inventory.save()
+
+    @staticmethod
+    @transaction.atomic
+    def set_hot_mode(inventory_pk, shards):
+        """Split a SKU's stock into ``shards`` sub-counters for flash sales, or fold it back with ``shards=0``.
+
+        In hot mode checkouts take stock from any shard they can lock without waiting instead of
+        queueing on the single inventory row, and ``reconcile_hot_stock`` keeps ``Inventory.stock``
+        up to date. Each shard is a non-negative counter decremented under its own row lock, so the
+        SKU can never be oversold.
+        """
+        inventory = Inventory.objects.select_for_update().get(pk=inventory_pk)
+        if inventory.shard_count:
+            held = InventoryShard.objects.select_for_update().filter(inventory=inventory).order_by('slot')
+            inventory.stock = sum(held.values_list('stock', flat=True))
+        InventoryService._reshard(inventory, shards)
+        return inventory
+
+    @staticmethod
+    def _hold_hot(merchant_pk, product_pk):
+        """Key-share lock a SKU's inventory row until commit; ``(pk, shard_count)``, or None without inventory.
+
+        Checkouts and restocks of hot SKUs hold this while they touch shards. Key-share locks do not
+        conflict with each other or with reconciliation's update, only with the row lock taken around
+        ``_reshard``, so shards are never moved under a checkout and a queued one sees the new layout.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT id, shard_count FROM {Inventory._meta.db_table} '
+                'WHERE merchant_id = %s AND product_id = %s FOR KEY SHARE',
+                [merchant_pk, product_pk],
+            )
+            return cursor.fetchone()
+
+    @staticmethod
+    def _take_hot(merchant_pk, product_pk, quantity):
+        """Take ``quantity`` of a hot SKU, normally from one shard nobody else holds."""
+        held = InventoryService._hold_hot(merchant_pk, product_pk)
+        if held is None:
+            raise ValueError(f'Insufficient stock for products: [{product_pk}]')
+        inventory_pk, shard_count = held
+        if not shard_count:
+            # Folded back into a plain row while this checkout waited for the reshard.
+            taken = Inventory.objects.filter(pk=inventory_pk, stock__gte=quantity).update(
+                stock=F('stock') - quantity, updated_at=timezone.now()
+            )
+            if not taken:
+                raise ValueError(f'Insufficient stock for products: [{product_pk}]')
+            invalidate_tags(INVENTORIES_TAG, product_tag(product_pk))
+            return
+        shards = InventoryShard._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {shards} SET stock = stock - %s WHERE id = ('
+                f'SELECT id FROM {shards} WHERE inventory_id = %s AND stock >= %s '
+                'ORDER BY random() LIMIT 1 FOR UPDATE SKIP LOCKED)',
+                [quantity, inventory_pk, quantity],
+            )
+            if cursor.rowcount:
+                return
+        # No free shard holds enough on its own: wait for all of them and drain across shards.
+        held = list(
+            InventoryShard.objects.select_for_update()
+            .filter(inventory_id=inventory_pk)
+            .order_by('slot')
+            .values_list('pk', 'stock')
+        )
+        if sum(stock for _, stock in held) < quantity:
+            raise ValueError(f'Insufficient stock for products: [{product_pk}]')
+        take, remaining = {}, quantity
+        for pk, stock in held:
+            if remaining and stock:
+                take[pk] = min(stock, remaining)
+                remaining -= take[pk]
+        InventoryShard.objects.filter(pk__in=take).update(
+            stock=Case(*[When(pk=pk, then=F('stock') - n) for pk, n in take.items()])
+        )
+
+    @staticmethod
+    def reconcile_hot_stock():
+        """Fold hot SKUs' shard totals into ``Inventory.stock`` and refill drained shards.
+
+        Rebalancing only touches shards no checkout is holding (``SKIP LOCKED``), so it never makes
+        an order wait. Returns the number of inventory rows whose stock changed.
+        """
+        for inventory_pk in Inventory.objects.filter(shard_count__gt=0).values_list('pk', flat=True):
+            with transaction.atomic():
+                held = list(
+                    InventoryShard.objects.select_for_update(skip_locked=True)
+                    .filter(inventory_id=inventory_pk)
+                    .order_by('slot')
+                )
+                base, extra = divmod(sum(shard.stock for shard in held), len(held) or 1)
+                changed = []
+                for i, shard in enumerate(held):
+                    if shard.stock != base + (i < extra):
+                        shard.stock = base + (i < extra)
+                        changed.append(shard)
+                InventoryShard.objects.bulk_update(changed, ['stock'])
+        shards, inventories = InventoryShard._meta.db_table, Inventory._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {inventories} i SET stock = s.total, updated_at = now() '
+                f'FROM (SELECT inventory_id, SUM(stock) AS total FROM {shards} GROUP BY inventory_id) s '
+                'WHERE i.id = s.inventory_id AND i.shard_count > 0 AND i.stock <> s.total '
+                'RETURNING i.product_id'
+            )
+            folded = [product_pk for (product_pk,) in cursor.fetchall()]
+        if folded:
+            invalidate_tags(INVENTORIES_TAG, *[product_tag(pk) for pk in folded])
+        return len(folded)
+
+    @staticmethod
+    @transaction.atomic
+    def decrement_stock_many(quantities):
+        """Decrement stock for many (merchant id, product id) pairs in a fixed number of queries.
+
+        Rows are locked in pk order with a single statement so concurrent carts touching the same
+        SKUs in a different order cannot deadlock, then decremented with one conditional UPDATE.
+        Hot SKUs (see ``set_hot_mode``) skip the row lock and take stock from their shards instead.
+        """
+        if not quantities:
+            return 0
+        rows = Q()
+        for mid, pid in quantities:
+            rows |= Q(merchant_id=mid, product_id=pid)
+        locked = {
+            (mid, pid): stock
+            for mid, pid, stock in Inventory.objects.select_for_update()
+            .filter(rows, shard_count=0)
+            .order_by('pk')
+            .values_list('merchant_id', 'product_id', 'stock')
+        }
+        plain = {key: qty for key, qty in quantities.items() if key in locked}
+        short = sorted(pid for (mid, pid), qty in plain.items() if locked[mid, pid] < qty)
+        if short:
+            raise ValueError(f'Insufficient stock for products: {short}')
+        if plain:
+            guard = Q()
+            for (mid, pid), qty in plain.items():
+                guard |= Q(merchant_id=mid, product_id=pid, stock__gte=qty)
+            updated = Inventory.objects.filter(guard).update(
+                stock=Case(
+                    *[When(merchant_id=mid, product_id=pid, then=F('stock') - qty) for (mid, pid), qty in plain.items()]
+                ),
+                updated_at=timezone.now(),
+            )
+            if updated != len(plain):
+                raise ValueError('Insufficient stock')
+            # Queryset updates bypass model signals, so drop cached reads of the touched rows explicitly.
+            invalidate_tags(INVENTORIES_TAG, *[product_tag(pid) for _, pid in plain])
+        # The rest are hot SKUs or have no inventory at all, which _take_hot reports as short. Sorted so
+        # concurrent carts wait on shards in the same order.
+        for mid, pid in sorted(quantities.keys() - plain.keys()):
+            InventoryService._take_hot(mid, pid, quantities[mid, pid])
+        return len(quantities)
+
+    @staticmethod
+    @transaction.atomic
+    def restock_many(quantities):
+        """Give stock back to many (merchant id, product id) pairs, e.g. from released reservations.
+
+        Plain rows are locked in pk order like ``decrement_stock_many`` and incremented with one
+        UPDATE; for hot SKUs the quantity goes to a random shard while the inventory row is key-share
+        locked, so a concurrent reshard cannot drop it (see ``_hold_hot``).
+        """
+        if not quantities:
+            return
+        rows = Q()
+        for mid, pid in quantities:
+            rows |= Q(merchant_id=mid, product_id=pid)
+        plain = list(
+            Inventory.objects.select_for_update()
+            .filter(rows, shard_count=0)
+            .order_by('pk')
+            .values_list('merchant_id', 'product_id')
+        )
+        if plain:
+            Inventory.objects.filter(rows, shard_count=0).update(
+                stock=Case(
+                    *[
+                        When(merchant_id=mid, product_id=pid, then=F('stock') + quantities[mid, pid])
+                        for mid, pid in plain
+                    ]
+                ),
+                updated_at=timezone.now(),
+            )
+            invalidate_tags(INVENTORIES_TAG, *[product_tag(pid) for _, pid in plain])
+        for mid, pid in sorted(quantities.keys() - set(plain)):
+            held = InventoryService._hold_hot(mid, pid)
+            if held is None:
+                continue
+            pk, shards = held
+            if shards:
+                InventoryShard.objects.filter(inventory_id=pk, slot=random.randrange(shards)).update(
+                    stock=F('stock') + quantities[mid, pid]
+                )
+            else:
+                # Folded back into a plain row while this waited for the reshard.
+                Inventory.objects.filter(pk=pk).update(
+                    stock=F('stock') + quantities[mid, pid], updated_at=timezone.now()
+                )
+                invalidate_tags(INVENTORIES_TAG, product_tag(pid))
+
+    @staticmethod
+    @transaction.atomic
+    def bulk_upsert(merchant_pk, rows):
+        """Set stock for many of a merchant's products with one ``INSERT ... ON CONFLICT`` per batch.
+
+        ``rows`` are ``{'product': id, 'stock': n}`` mappings (values may be strings, e.g. from CSV).
+        Returns ``{'upserted': n, 'superseded': n, 'errors': [{'index': i, 'error': msg}, ...]}``; invalid
+        rows are skipped, and when a product repeats the last row wins and the earlier ones count as superseded.
+        """
+        errors, latest, superseded = [], {}, 0
+        for index, raw in enumerate(rows):
+            try:
+                product_pk, stock = int(raw['product']), int(raw['stock'])
+                if product_pk < 1 or stock < 0:
+                    raise ValueError('product must be positive and stock non-negative')
+            except (KeyError, TypeError, ValueError) as e:
+                errors.append({'index': index, 'error': str(e)})
+                continue
+            superseded += product_pk in latest
+            latest[product_pk] = (index, stock)
+        owned = set(Product.objects.filter(merchant_id=merchant_pk, pk__in=latest.keys()).values_list('pk', flat=True))
+        for product_pk, (index, _) in latest.items():
+            if product_pk not in owned:
+                errors.append(
+                    {'index': index, 'error': f'product {product_pk} does not belong to merchant {merchant_pk}'}
+                )
+        inventories = [
+            Inventory(merchant_id=merchant_pk, product_id=product_pk, stock=stock)
+            for product_pk, (_, stock) in latest.items()
+            if product_pk in owned
+        ]
+        # Hot SKUs are row-locked before the upsert and resharded in the same transaction (see _reshard).
+        hot = list(
+            Inventory.objects.select_for_update()
+            .filter(merchant_id=merchant_pk, product_id__in=owned, shard_count__gt=0)
+            .order_by('pk')
+        )
+        Inventory.objects.bulk_create(
+            inventories,
+            batch_size=settings.INVENTORY_BULK_BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['merchant', 'product'],
+            update_fields=['stock', 'updated_at'],
+        )
+        if inventories:
+            # bulk_create bypasses model signals, so drop cached reads of the touched rows explicitly.
+            invalidate_tags(INVENTORIES_TAG, *[product_tag(inv.product_id) for inv in inventories])
+        for inv in hot:
+            inv.stock = latest[inv.product_id][1]
+            InventoryService._reshard(inv, inv.shard_count)
+        return {
+            'upserted': len(inventories),
+            'superseded': superseded,
+            'errors': sorted(errors, key=lambda e: e['index']),
+        }
 
 
 class OrderService:
+    @staticmethod
+    def check_deliverable(merchant_pks, address):
+        """Reject addresses outside the merchants' delivery zones using the in-process zone index."""
+        lat, lng = address.location.y, address.location.x
+        undeliverable = sorted(pk for pk in merchant_pks if not zone_index.merchant_serves(pk, lat, lng))
+        if undeliverable:
+            raise ValueError(f'Address is outside the delivery zones of merchants: {undeliverable}')
+
+    @staticmethod
+    def _merge_quantities(items):
+        quantities = {}
+        for prod, qty in items:
+            key = (prod.merchant_id, prod.pk)
+            quantities[key] = quantities.get(key, 0) + qty
+        return quantities
+
+    @staticmethod
+    def _build_items(order, items):
+        return [
+            OrderItem(order=order, product=prod, quantity=qty, unit_price=prod.price, line_total=prod.price * qty)
+            for prod, qty in items
+        ]
+
     @staticmethod
     @transaction.atomic
     def place_order(user, merchant, address, items):
+        """Place an order with a constant number of queries regardless of cart size."""
+        foreign = sorted(prod.pk for prod, _ in items if prod.merchant_id != merchant.pk)
+        if foreign:
+            raise ValueError(f'Products do not belong to merchant {merchant.pk}: {foreign}')
+        OrderService.check_deliverable([merchant.pk], address)
+        InventoryService.decrement_stock_many(OrderService._merge_quantities(items))
+        total = sum(prod.price * qty for prod, qty in items)
         order = Order.objects.create(
-            user=user, merchant=merchant, address=address, status=ORDER_STATUS_PENDING, total=0
-        )
-        total = 0
-        sid = transaction.savepoint()
-        try:
-            for prod, qty in items:
-                InventoryService.decrement_stock_atomic(merchant, prod, qty)
-                line_total = prod.price * qty
-                total += line_total
-                OrderItem.objects.create(
-                    order=order,
-                    product=prod,
-                    quantity=qty,
-                    unit_price=prod.price,
-                    line_total=line_total,
-                )
-            order.total = total
-            order.status = ORDER_STATUS_PENDING
-            order.save()
-        except Exception:
-            transaction.savepoint_rollback(sid)
-            raise
-        transaction.savepoint_commit(sid)
+            user=user, merchant=merchant, address=address, status=ORDER_STATUS_PENDING, total=total
+        )
+        OrderItem.objects.bulk_create(OrderService._build_items(order, items))
+        SalesRollupService.record([(order, prod, qty) for prod, qty in items])
         return order
 
+    @staticmethod
+    @transaction.atomic
+    def checkout_cart(user, address, items):
+        """Split a mixed basket by merchant and place every order in one all-or-nothing transaction.
+
+        Inventory for all merchants is locked and decremented in a single pass, and orders and their
+        items are each written with one ``bulk_create``.
+        """
+        if not items:
+            raise ValueError('Cart must contain at least one item')
+        by_merchant = {}
+        for prod, qty in items:
+            by_merchant.setdefault(prod.merchant_id, []).append((prod, qty))
+        OrderService.check_deliverable(by_merchant, address)
+        InventoryService.decrement_stock_many(OrderService._merge_quantities(items))
+        return OrderService._create_orders(user, address, by_merchant)
+
+    @staticmethod
+    def _create_orders(user, address, by_merchant):
+        """Write one order per merchant for ``{merchant id: [(product, quantity), ...]}``; stock is already taken."""
+        orders = Order.objects.bulk_create(
+            [
+                Order(
+                    user=user,
+                    merchant_id=merchant_id,
+                    address=address,
+                    status=ORDER_STATUS_PENDING,
+                    total=sum(prod.price * qty for prod, qty in lines),
+                )
+                for merchant_id, lines in by_merchant.items()
+            ]
+        )
+        OrderItem.objects.bulk_create(
+            [
+                item
+                for order, lines in zip(orders, by_merchant.values())
+                for item in OrderService._build_items(order, lines)
+            ]
+        )
+        SalesRollupService.record(
+            [(order, prod, qty) for order, lines in zip(orders, by_merchant.values()) for prod, qty in lines]
+        )
+        return orders
+
+
+class ReservationService:
+    @staticmethod
+    @transaction.atomic
+    def reserve(user, items, ttl=None):
+        """Hold stock for ``(product, quantity)`` lines for ``ttl`` seconds (``RESERVATION_TTL_SECONDS``).
+
+        Stock is taken from inventory right away in one short transaction, so ``convert`` can turn
+        the hold into orders later without locking inventory again. Expired holds are handed back
+        by ``release_expired``.
+        """
+        if not items:
+            raise ValueError('Reservation must contain at least one item')
+        InventoryService.decrement_stock_many(OrderService._merge_quantities(items))
+        reservation = StockReservation.objects.create(
+            user=user, expires_at=timezone.now() + timedelta(seconds=ttl or settings.RESERVATION_TTL_SECONDS)
+        )
+        StockReservationItem.objects.bulk_create(
+            [StockReservationItem(reservation=reservation, product=prod, quantity=qty) for prod, qty in items]
+        )
+        return reservation
+
+    @staticmethod
+    def _lock_held(reservation_pk, user):
+        reservation = (
+            StockReservation.objects.select_for_update()
+            .filter(pk=reservation_pk, user=user, status=RESERVATION_STATUS_HELD)
+            .first()
+        )
+        if reservation is None:
+            raise ValueError('Reservation not found or no longer held')
+        return reservation
+
+    @staticmethod
+    @transaction.atomic
+    def convert(reservation_pk, user, address):
+        """Turn a live hold into one order per merchant at current prices; inventory is not touched."""
+        reservation = ReservationService._lock_held(reservation_pk, user)
+        if reservation.expires_at <= timezone.now():
+            raise ValueError('Reservation has expired')
+        by_merchant = {}
+        for item in reservation.items.select_related('product'):
+            by_merchant.setdefault(item.product.merchant_id, []).append((item.product, item.quantity))
+        OrderService.check_deliverable(by_merchant, address)
+        orders = OrderService._create_orders(user, address, by_merchant)
+        reservation.status = RESERVATION_STATUS_CONVERTED
+        reservation.save(update_fields=['status'])
+        return orders
+
+    @staticmethod
+    @transaction.atomic
+    def release(reservation_pk, user):
+        """Cancel a hold and return its stock."""
+        reservation = ReservationService._lock_held(reservation_pk, user)
+        ReservationService._restock([reservation.pk], RESERVATION_STATUS_RELEASED)
+
+    @staticmethod
+    def release_expired(batch_size=None):
+        """Return the stock of expired holds, one short transaction per batch.
+
+        Holds are claimed with ``FOR UPDATE SKIP LOCKED``, so several sweepers can run at once and a
+        hold being converted right now is left alone. Returns the number of holds released.
+        """
+        batch_size = batch_size or settings.RESERVATION_SWEEP_BATCH_SIZE
+        released = 0
+        while True:
+            with transaction.atomic():
+                pks = list(
+                    StockReservation.objects.select_for_update(skip_locked=True)
+                    .filter(status=RESERVATION_STATUS_HELD, expires_at__lte=timezone.now())
+                    .order_by('expires_at')
+                    .values_list('pk', flat=True)[:batch_size]
+                )
+                if pks:
+                    ReservationService._restock(pks, RESERVATION_STATUS_EXPIRED)
+            released += len(pks)
+            if len(pks) < batch_size:
+                return released
+
+    @staticmethod
+    def _restock(reservation_pks, status):
+        quantities = {
+            (row['product__merchant_id'], row['product_id']): row['quantity']
+            for row in StockReservationItem.objects.filter(reservation_id__in=reservation_pks)
+            .values('product__merchant_id', 'product_id')
+            .annotate(quantity=Sum('quantity'))
+        }
+        InventoryService.restock_many(quantities)
+        StockReservation.objects.filter(pk__in=reservation_pks).update(status=status)
+
+
+class SalesRollupService:
+    @staticmethod
+    def record(lines):
+        """Add ``(order, product, quantity)`` lines to the daily rollup with one upsert.
+
+        Runs inside the order's transaction, so the rollup commits or rolls back with the order.
+        """
+        deltas = {}
+        for order, prod, qty in lines:
+            key = (timezone.localdate(order.created_at), order.merchant_id, prod.pk)
+            quantity, total = deltas.get(key, (0, 0))
+            deltas[key] = (quantity + qty, total + prod.price * qty)
+        if not deltas:
+            return
+        # Sorted so concurrent orders touching the same rows take their locks in the same order.
+        rows = sorted(deltas.items())
+        table = DailySales._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {table} AS t (day, merchant_id, product_id, quantity, total) '
+                f'VALUES {", ".join(["(%s, %s, %s, %s, %s)"] * len(rows))} '
+                'ON CONFLICT (day, merchant_id, product_id) DO UPDATE '
+                'SET quantity = t.quantity + EXCLUDED.quantity, total = t.total + EXCLUDED.total',
+                [
+                    value
+                    for (day, merchant_pk, product_pk), (qty, total) in rows
+                    for value in (day, merchant_pk, product_pk, qty, total)
+                ],
+            )
+
+    @staticmethod
+    @transaction.atomic
+    def rebuild(start=None, end=None):
+        """Recompute the rollup from ``OrderItem`` for the inclusive day range (all days when open).
+
+        The table is locked against concurrent upserts for the duration, so orders placed meanwhile
+        are either counted by the rebuild or added on top of it once it commits, never both.
+        """
+        rollup, items, orders = DailySales._meta.db_table, OrderItem._meta.db_table, Order._meta.db_table
+        bounds = [(op, value) for op, value in (('>=', start), ('<=', end)) if value is not None]
+        order_day = '(o.created_at AT TIME ZONE %s)::date'
+        tz = timezone.get_current_timezone_name()
+        with connection.cursor() as cursor:
+            cursor.execute(f'LOCK TABLE {rollup} IN SHARE ROW EXCLUSIVE MODE')
+            cursor.execute(
+                f'DELETE FROM {rollup} WHERE TRUE' + ''.join(f' AND day {op} %s' for op, _ in bounds),
+                [value for _, value in bounds],
+            )
+            cursor.execute(
+                f'INSERT INTO {rollup} (day, merchant_id, product_id, quantity, total) '
+                f'SELECT {order_day}, o.merchant_id, i.product_id, SUM(i.quantity), SUM(i.line_total) '
+                f'FROM {items} i JOIN {orders} o ON o.id = i.order_id WHERE TRUE'
+                + ''.join(f' AND {order_day} {op} %s' for op, _ in bounds)
+                + ' GROUP BY 1, 2, 3',
+                [tz] + [param for _, value in bounds for param in (tz, value)],
+            )
+            return cursor.rowcount
+
+    @staticmethod
+    def top_products(start=None, end=None, merchant_pk=None):
+        """Best-selling product per merchant over the inclusive day range, read from the rollup."""
+        qs = DailySales.objects.all()
+        if start is not None:
+            qs = qs.filter(day__gte=start)
+        if end is not None:
+            qs = qs.filter(day__lte=end)
+        if merchant_pk is not None:
+            qs = qs.filter(merchant_id=merchant_pk)
+        return (
+            qs.values('product__id', 'product__name', 'merchant__id', 'merchant__name')
+            .annotate(total_sales=Sum('total'))
+            .annotate(
+                rank=Window(expression=Rank(), partition_by=[F('merchant__id')], order_by=F('total_sales').desc())
+            )
+            .filter(rank=1)
+        )
+
+
+class DeliveryZoneService:
+    @staticmethod
+    def rebuild_parts(zone_pk):
+        """Replace a zone's subdivided parts with ``ST_Subdivide`` of its current area."""
+        DeliveryZonePart.objects.filter(zone_id=zone_pk).delete()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {DeliveryZonePart._meta.db_table} (zone_id, area) '
+                f'SELECT id, ST_Subdivide(area, %s) FROM {DeliveryZone._meta.db_table} WHERE id = %s',
+                [settings.ZONE_SUBDIVIDE_MAX_VERTICES, zone_pk],
+            )
+
+    @staticmethod
+    def zones_containing(lat, lng):
+        """Ids of zones whose area contains the point, checked against the small subdivided parts."""
+        point = Point(lng, lat, srid=4326)
+        return set(DeliveryZonePart.objects.filter(area__intersects=point).values_list('zone_id', flat=True))
+
+    @staticmethod
+    def add_merchant_zones(merchant_pk, zone_pks):
+        products = Product.objects.filter(merchant_id=merchant_pk, is_published=True).values_list('pk', flat=True)
+        ZoneProduct.objects.bulk_create(
+            [ZoneProduct(zone_id=z, product_id=p, merchant_id=merchant_pk) for z in zone_pks for p in products],
+            ignore_conflicts=True,
+        )
+
+    @staticmethod
+    def sync_product(product):
+        """Make a product's zone memberships match its merchant's zones and published state."""
+        ZoneProduct.objects.filter(product_id=product.pk).delete()
+        if not product.is_published:
+            return
+        zone_pks = Merchant.delivery_zones.through.objects.filter(merchant_id=product.merchant_id).values_list(
+            'deliveryzone_id', flat=True
+        )
+        ZoneProduct.objects.bulk_create(
+            [ZoneProduct(zone_id=z, product_id=product.pk, merchant_id=product.merchant_id) for z in zone_pks],
+            ignore_conflicts=True,
+        )
+
+    @staticmethod
+    def products_in_zone(zone_pk, after=None, limit=50):
+        """Published products served in a zone, keyset-paginated by product id."""
+        qs = Product.objects.filter(zone_memberships__zone_id=zone_pk, is_published=True)
+        if after is not None:
+            qs = qs.filter(pk__gt=after)
+        return list(qs.order_by('pk')[:limit])
+
 
 class DeliveryService:
     @staticmethod
     async def get_eta_for_order(order_id):
-        # In production, use aiohttp to fetch live ETA from external API
-        # Here, we simply async sleep and return a mock ETA, e.g., 15 min
-        await asyncio.sleep(0.1)
-        return {'order': order_id, 'eta_minutes': 15}
+        return await eta_client.get(order_id)
 
     @staticmethod
     async def get_eta_for_orders(order_ids):
-        tasks = [DeliveryService.get_eta_for_order(oid) for oid in order_ids]
-        return await asyncio.gather(*tasks)
+        return await eta_client.get_many(order_ids)
@@ -0,0 +1,130 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from app.models import Address, DeliveryZone, Inventory, Merchant, Product, ProductCategory, ZoneProduct
+from app.services import DeliveryZoneService
+from app.utils.cache import (
+    INVENTORIES_TAG,
+    MERCHANTS_TAG,
+    PRODUCTS_TAG,
+    ZONES_TAG,
+    category_tag,
+    invalidate_nearby_tiles,
+    invalidate_product_cache,
+    invalidate_tags,
+    merchant_tag,
+    product_tag,
+)
+from app.utils.zone_index import zone_index
+
+
+def _sync_merchant_location(merchant_pk, location):
+    """Move the denormalized ``Product.merchant_location`` and drop nearby tiles at both ends."""
+    old = Product.objects.filter(merchant_id=merchant_pk).values_list('merchant_location', flat=True).first()
+    if Product.objects.filter(merchant_id=merchant_pk).update(merchant_location=location) == 0:
+        return
+    # Cached nearby facets are keyed by search point rather than tile, so they go with the product tag.
+    invalidate_tags(PRODUCTS_TAG)
+    for point in {old, location} - {None}:
+        invalidate_nearby_tiles(point.y, point.x)
+        transaction.on_commit(lambda point=point: invalidate_nearby_tiles(point.y, point.x))
+
+
+@receiver(pre_save, sender=Product)
+def set_product_merchant_location(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and 'merchant' not in update_fields:
+        return
+    instance.merchant_location = (
+        Address.objects.filter(merchant__id=instance.merchant_id).values_list('location', flat=True).first()
+    )
+
+
+@receiver([post_save, post_delete], sender=Product)
+def invalidate_on_product_change(sender, instance, **kwargs):
+    invalidate_product_cache(instance.pk, instance.merchant_location)
+
+
+@receiver(post_save, sender=Product)
+def sync_product_zone_membership(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not {'is_published', 'merchant'} & set(update_fields):
+        return
+    DeliveryZoneService.sync_product(instance)
+
+
+@receiver(m2m_changed, sender=Merchant.delivery_zones.through)
+def sync_merchant_zone_membership(sender, instance, action, reverse, pk_set, **kwargs):
+    if action.startswith('post_'):
+        _invalidate_zone_index()
+    if action == 'post_add':
+        if reverse:
+            for merchant_pk in pk_set:
+                DeliveryZoneService.add_merchant_zones(merchant_pk, [instance.pk])
+        else:
+            DeliveryZoneService.add_merchant_zones(instance.pk, pk_set)
+    elif action == 'post_remove':
+        lookup = {'zone_id': instance.pk, 'merchant_id__in': pk_set}
+        if not reverse:
+            lookup = {'merchant_id': instance.pk, 'zone_id__in': pk_set}
+        ZoneProduct.objects.filter(**lookup).delete()
+    elif action == 'pre_clear':
+        ZoneProduct.objects.filter(**{'zone_id' if reverse else 'merchant_id': instance.pk}).delete()
+
+
+@receiver(post_save, sender=DeliveryZone)
+def rebuild_zone_parts(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or 'area' in update_fields:
+        DeliveryZoneService.rebuild_parts(instance.pk)
+
+
+def _invalidate_zone_index():
+    invalidate_tags(ZONES_TAG)
+    zone_index.mark_stale()
+    transaction.on_commit(zone_index.mark_stale)
+
+
+@receiver([post_save, post_delete], sender=DeliveryZone)
+def invalidate_zone_index_on_zone_change(sender, instance, **kwargs):
+    _invalidate_zone_index()
+
+
+@receiver([post_save, post_delete], sender=Merchant)
+def invalidate_on_merchant_change(sender, instance, **kwargs):
+    invalidate_tags(merchant_tag(instance.pk), MERCHANTS_TAG)
+
+
+@receiver(post_save, sender=Merchant)
+def sync_on_merchant_address_swap(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields is not None and 'address' not in update_fields):
+        return
+    _sync_merchant_location(instance.pk, instance.address.location)
+
+
+@receiver(post_save, sender=Address)
+def invalidate_on_merchant_address_change(sender, instance, created, **kwargs):
+    if created:
+        return
+    merchant_pk = Merchant.objects.filter(address_id=instance.pk).values_list('pk', flat=True).first()
+    if merchant_pk is not None:
+        invalidate_tags(merchant_tag(merchant_pk), MERCHANTS_TAG)
+        _sync_merchant_location(merchant_pk, instance.location)
+
+
+@receiver(m2m_changed, sender=Merchant.categories.through)
+def invalidate_on_merchant_categories_change(sender, instance, action, reverse, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if reverse:
+        invalidate_tags(category_tag(instance.pk), MERCHANTS_TAG)
+    else:
+        invalidate_tags(merchant_tag(instance.pk), MERCHANTS_TAG)
+
+
+@receiver([post_save, post_delete], sender=ProductCategory)
+def invalidate_on_category_change(sender, instance, **kwargs):
+    invalidate_tags(category_tag(instance.pk))
+
+
+@receiver([post_save, post_delete], sender=Inventory)
+def invalidate_on_inventory_change(sender, instance, **kwargs):
+    invalidate_tags(product_tag(instance.product_id), INVENTORIES_TAG)
@@ -1,5 +1,7 @@
 """Example Celery tasks for the project."""
 
+from datetime import date
+
 from celery import shared_task
 
 
@@ -7,3 +9,53 @@ from celery import shared_task
 def ping() -> str:
     """Simple task used for health checks."""
     return 'pong'
+
+
+@shared_task(name='app.purge_expired_courier_positions')
+def purge_expired_courier_positions() -> int:
+    """Drop couriers that have not pinged within ``COURIER_POSITION_TTL``."""
+    from app.utils.courier_store import get_courier_store
+
+    return get_courier_store().purge_expired()
+
+
+@shared_task(name='app.reconcile_hot_stock')
+def reconcile_hot_stock() -> int:
+    """Fold hot-SKU shard counts back into ``Inventory.stock``."""
+    from app.services import InventoryService
+
+    return InventoryService.reconcile_hot_stock()
+
+
+@shared_task(name='app.release_expired_reservations')
+def release_expired_reservations() -> int:
+    """Hand the stock of expired checkout reservations back to inventory."""
+    from app.services import ReservationService
+
+    return ReservationService.release_expired()
+
+
+@shared_task(name='app.rebuild_sales_rollup')
+def rebuild_sales_rollup(start: str | None = None, end: str | None = None) -> int:
+    """Recompute ``DailySales`` for the inclusive ISO date range (everything when omitted)."""
+    from app.services import SalesRollupService
+
+    return SalesRollupService.rebuild(
+        start=date.fromisoformat(start) if start else None, end=date.fromisoformat(end) if end else None
+    )
+
+
+@shared_task(name='app.bulk_upsert_inventory')
+def bulk_upsert_inventory(merchant_pk: int, rows: list) -> dict:
+    """Background path for inventory syncs larger than ``INVENTORY_BULK_SYNC_MAX_ROWS``."""
+    from app.services import InventoryService
+
+    return InventoryService.bulk_upsert(merchant_pk, rows)
+
+
+@shared_task(name='app.import_catalog')
+def import_catalog(merchant_pk: int, path: str, fmt: str | None = None) -> dict:
+    """Background catalog import of a file readable by the worker; see ``app.utils.catalog_import``."""
+    from app.utils.catalog_import import import_catalog_file
+
+    return import_catalog_file(merchant_pk, path, fmt=fmt)
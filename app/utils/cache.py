@@ -1,9 +1,25 @@
 import hashlib
-import json
+import math
+import random
+import time
+import uuid
+import zlib
+from collections import Counter
 
+import orjson
+from django.conf import settings
 from django.core.cache import cache
+from django.db import transaction
 
-CACHE_VERSION = 'v2'
+from app.utils.geo import cell_center, cell_half_diagonal_km, cells_covering, grid_cell, haversine_km
+from app.utils.local_cache import local_cache
+
+CACHE_VERSION = 'v4'
+
+MERCHANTS_TAG = 'merchants'
+PRODUCTS_TAG = 'products'
+INVENTORIES_TAG = 'inventories'
+ZONES_TAG = 'zones'
 
 
 def _versioned_key(base, *args):
@@ -11,19 +27,230 @@ def _versioned_key(base, *args):
     return hashlib.sha256(key.encode()).hexdigest()
 
 
-def get_cached_product_search(lat, lng, radius_m, pname=None):
-    key = _versioned_key('product_search', lat, lng, radius_m, pname or '')
-    val = cache.get(key)
-    if val:
-        return json.loads(val)
-    return None
+def _nearby_tile_key(cell):
+    return _versioned_key('nearby_tile', settings.NEARBY_TILE_DEG, *cell)
+
+
+def nearby_tile_for(lat, lng):
+    """Return the grid cell a search point falls in."""
+    return grid_cell(lat, lng, settings.NEARBY_TILE_DEG)
+
+
+def nearby_tile_cover(cell):
+    """Centre ``(lat, lng)`` and covering radius (km) a cell must cache to answer any search inside it."""
+    cover_km = settings.NEARBY_MAX_RADIUS_KM + cell_half_diagonal_km(cell, settings.NEARBY_TILE_DEG)
+    return cell_center(cell, settings.NEARBY_TILE_DEG), cover_km
+
+
+def get_or_load_nearby_tile(cell, loader):
+    """``[[lat, lng, item], ...]`` candidates for a cell, cached as (possibly compressed) JSON bytes.
+
+    ``loader(cell)`` runs single-flight through ``get_or_compute`` when the tile is missing or due.
+    """
+    entry = get_or_compute(
+        _nearby_tile_key(cell),
+        lambda: pack_body(orjson.dumps(loader(cell))),
+        timeout=settings.NEARBY_TILE_TIMEOUT,
+        namespace='nearby_tile',
+    )
+    return orjson.loads(unpack_body(entry))
+
+
+def nearest_from_tile(candidates, lat, lng, radius_km, pname=None, limit=30):
+    """Filter a tile's candidates to the exact radius and name, ordered by distance."""
+    needle = pname.casefold() if pname else None
+    hits = []
+    for c_lat, c_lng, item in candidates:
+        if needle and needle not in item['name'].casefold():
+            continue
+        dist = haversine_km(lat, lng, c_lat, c_lng)
+        if dist <= radius_km:
+            hits.append((dist, item))
+    hits.sort(key=lambda hit: hit[0])
+    return [item for _, item in hits[:limit]]
+
+
+def invalidate_nearby_tiles(lat, lng):
+    """Drop every tile whose candidate set could contain something located at ``(lat, lng)``."""
+    cells = cells_covering(lat, lng, settings.NEARBY_MAX_RADIUS_KM, settings.NEARBY_TILE_DEG)
+    keys = [_nearby_tile_key(cell) for cell in cells]
+    cache.delete_many(keys)
+    local_cache.invalidate(keys)
+
+
+def merchant_tag(pk):
+    return f'merchant:{pk}'
+
+
+def product_tag(pk):
+    return f'product:{pk}'
+
+
+def category_tag(pk):
+    return f'category:{pk}'
+
+
+def _tag_key(tag):
+    return _versioned_key('tag', tag)
+
+
+def tag_versions(tags):
+    """Current generation of each tag, starting unseen (or evicted) tags at a fresh value.
+
+    Generations are held in the per-process tier, which ``bump_tags`` invalidates across workers.
+    """
+    epoch = local_cache.epoch
+    versions, missing = {}, {}
+    for tag in tags:
+        key = _tag_key(tag)
+        found, version = local_cache.get('tag', key)
+        if found:
+            versions[tag] = version
+        else:
+            missing[tag] = key
+    if missing:
+        found = cache.get_many(missing.values())
+        for tag, key in missing.items():
+            if key not in found:
+                cache.add(key, time.time_ns(), timeout=None)
+                found[key] = cache.get(key)
+            versions[tag] = found[key]
+            local_cache.set('tag', key, found[key], epoch)
+    return versions
+
+
+def bump_tags(*tags):
+    """Invalidate every entry carrying any of ``tags`` with one INCR per tag."""
+    for tag in tags:
+        try:
+            cache.incr(_tag_key(tag))
+        except ValueError:
+            cache.set(_tag_key(tag), time.time_ns(), timeout=None)
+    local_cache.invalidate(_tag_key(tag) for tag in tags)
+
+
+def invalidate_tags(*tags):
+    """Bump now and again on commit, so a reader cannot re-cache pre-commit state under the new generation."""
+    bump_tags(*tags)
+    transaction.on_commit(lambda: bump_tags(*tags))
+
+
+def pack_body(body, content_type=None):
+    """Cache entry for a rendered body, zlib-compressed once it exceeds ``CACHE_COMPRESS_MIN_BYTES``.
+
+    zlib's format is HTTP's ``deflate`` coding, so a compressed body can be sent to clients as is.
+    """
+    entry = {'etag': f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"', 'content_type': content_type}
+    if len(body) >= settings.CACHE_COMPRESS_MIN_BYTES:
+        entry.update(body=zlib.compress(body, settings.CACHE_COMPRESS_LEVEL), encoding='deflate')
+    else:
+        entry.update(body=body, encoding=None)
+    return entry
+
+
+def unpack_body(entry):
+    return zlib.decompress(entry['body']) if entry['encoding'] == 'deflate' else entry['body']
+
+
+def get_or_set_tagged_body(key, render, tags=(), timeout=None):
+    """Read-through cache of a rendered response body that is dropped as soon as any of its tags is bumped.
+
+    ``render`` returns ``(body, content_type, extra_tags)``; the ``pack_body`` entry is returned. Tags known
+    up front are snapshotted before rendering so a bump racing with the load is never lost; ``extra_tags``
+    are derived from the loaded object. Recomputes are single-flight (see ``get_or_compute``); an entry
+    whose tags moved is never served stale.
+    """
+
+    def compute():
+        versions = tag_versions(tags)
+        body, content_type, extra_tags = render()
+        versions.update(tag_versions(set(extra_tags) - versions.keys()))
+        return {'tags': versions, **pack_body(body, content_type)}
+
+    return get_or_compute(
+        key,
+        compute,
+        timeout=settings.READ_CACHE_TIMEOUT if timeout is None else timeout,
+        namespace='read',
+        is_valid=lambda entry: tag_versions(entry['tags']) == entry['tags'],
+    )
+
+
+cache_stats = Counter()
+
+
+def get_or_compute(key, compute, timeout, namespace='default', is_valid=None):
+    """Stampede-safe read-through: single-flight recompute, stale serving and probabilistic early refresh.
+
+    Values are stored with their logical expiry and last compute time, and kept ``CACHE_STALE_SECONDS``
+    past expiry. A request refreshes early with a probability that grows as expiry nears, scaled by
+    how long the value took to compute (XFetch), so hot keys are usually rebuilt before they lapse.
+    Only the holder of a short ``cache.add`` lock recomputes; everyone else gets the stale value, or
+    waits up to ``CACHE_LOCK_WAIT`` for the holder when there is none. Entries failing ``is_valid``
+    (e.g. tag-invalidated) count as absent. Events are counted per namespace in ``cache_stats``.
+    """
+    epoch = local_cache.epoch
+    found, entry = local_cache.get(namespace, key)
+    if not found or entry['expires'] <= time.time() or (is_valid is not None and not is_valid(entry['value'])):
+        entry = cache.get(key)
+        if entry is not None and is_valid is not None and not is_valid(entry['value']):
+            entry = None
+        if entry is not None:
+            local_cache.set(namespace, key, entry, epoch)
+    if entry is not None:
+        early = entry['delta'] * settings.CACHE_EARLY_EXPIRY_BETA * -math.log(1.0 - random.random())
+        if time.time() + early < entry['expires']:
+            cache_stats[namespace, 'hit'] += 1
+            return entry['value']
+
+    lock_key, token = f'{key}:lock', uuid.uuid4().hex
+    if cache.add(lock_key, token, timeout=settings.CACHE_LOCK_TIMEOUT):
+        cache_stats[namespace, 'miss' if entry is None else 'refresh'] += 1
+        try:
+            epoch = local_cache.epoch
+            started = time.monotonic()
+            value = compute()
+            entry = {'value': value, 'expires': time.time() + timeout, 'delta': time.monotonic() - started}
+            cache.set(key, entry, timeout=timeout + settings.CACHE_STALE_SECONDS)
+            local_cache.set(namespace, key, entry, epoch)
+            return value
+        finally:
+            if cache.get(lock_key) == token:
+                cache.delete(lock_key)
+
+    if entry is not None:
+        cache_stats[namespace, 'stale'] += 1
+        return entry['value']
+
+    cache_stats[namespace, 'lock_wait'] += 1
+    deadline = time.monotonic() + settings.CACHE_LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(settings.CACHE_LOCK_POLL)
+        entry = cache.get(key)
+        if entry is not None and (is_valid is None or is_valid(entry['value'])):
+            return entry['value']
+    # The holder is slow or died; compute without caching rather than fail the request.
+    cache_stats[namespace, 'lock_timeout'] += 1
+    return compute()
+
+
+def cache_stats_snapshot():
+    """``{namespace: {event: count}}`` for this process since start; ``local:*`` is the in-process tier."""
+    snapshot = {}
+    for (namespace, event), count in cache_stats.items():
+        snapshot.setdefault(namespace, {})[event] = count
+    for (namespace, event), count in local_cache.stats.items():
+        snapshot.setdefault(f'local:{namespace}', {})[event] = count
+    return snapshot
 
 
-def set_cached_product_search(lat, lng, radius_m, pname, data, timeout=120):
-    key = _versioned_key('product_search', lat, lng, radius_m, pname or '')
-    cache.set(key, json.dumps(data), timeout=timeout)
+def read_cache_key(namespace, *args):
+    return _versioned_key('read', namespace, *args)
 
 
-def invalidate_product_cache(*args, **kwargs):
-    # For future: could scan/delete keys by version prefix when stock is updated
-    pass
+def invalidate_product_cache(product_pk, location=None):
+    """Drop cached reads of a product and, given its merchant's location, the nearby tiles around it."""
+    invalidate_tags(product_tag(product_pk), PRODUCTS_TAG)
+    if location is not None:
+        invalidate_nearby_tiles(location.y, location.x)
+        transaction.on_commit(lambda: invalidate_nearby_tiles(location.y, location.x))
@@ -0,0 +1,179 @@
+import csv
+import json
+import time
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from app.models import Address, Merchant, Product, ProductCategory, ZoneProduct
+from app.utils.cache import PRODUCTS_TAG, invalidate_nearby_tiles, invalidate_tags, merchant_tag
+
+STAGING_TABLE = 'catalog_import_staging'
+MAX_REJECTS_REPORTED = 1000
+_NAME_MAX = Product._meta.get_field('name').max_length
+_CATEGORY_NAME_MAX = ProductCategory._meta.get_field('name').max_length
+_PRICE = Product._meta.get_field('price')
+_TRUE = {'1', 'true', 't', 'yes', 'y'}
+_FALSE = {'0', 'false', 'f', 'no', 'n'}
+
+
+def read_rows(stream, fmt):
+    """``(line, dict)`` pairs from a text stream of CSV (with header) or NDJSON, read lazily."""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line, text in enumerate(stream, start=1):
+        if text.strip():
+            try:
+                yield line, json.loads(text)
+            except ValueError as e:
+                yield line, e
+
+
+def _clean(raw):
+    """Validate one input row into ``(name, description, category_name, price, is_published)``."""
+    if isinstance(raw, Exception):
+        raise ValueError(f'invalid JSON: {raw}')
+    if not isinstance(raw, dict):
+        raise ValueError('row must be an object')
+    name = str(raw.get('name') or '').strip()
+    category = str(raw.get('category') or '').strip()
+    if not name or len(name) > _NAME_MAX:
+        raise ValueError(f'name is required and at most {_NAME_MAX} characters')
+    if not category or len(category) > _CATEGORY_NAME_MAX:
+        raise ValueError(f'category is required and at most {_CATEGORY_NAME_MAX} characters')
+    try:
+        price = Decimal(str(raw.get('price')).strip())
+    except InvalidOperation:
+        raise ValueError('price must be a number')
+    if not price.is_finite() or price < 0 or price.as_tuple().exponent < -_PRICE.decimal_places:
+        raise ValueError(f'price must be non-negative with at most {_PRICE.decimal_places} decimal places')
+    if price >= 10 ** (_PRICE.max_digits - _PRICE.decimal_places):
+        raise ValueError('price is too large')
+    published = raw.get('is_published')
+    if published is None or published == '':
+        published = True
+    elif not isinstance(published, bool):
+        text = str(published).strip().lower()
+        if text not in _TRUE | _FALSE:
+            raise ValueError('is_published must be a boolean')
+        published = text in _TRUE
+    return name, str(raw.get('description') or ''), category, price, published
+
+
+def _resolve_categories(names, create):
+    """Category ids by name for a chunk, creating the missing ones in one statement when ``create``."""
+    found = dict(ProductCategory.objects.filter(name__in=names).values_list('name', 'pk'))
+    missing = set(names) - found.keys()
+    if missing and create:
+        ProductCategory.objects.bulk_create([ProductCategory(name=n) for n in missing], ignore_conflicts=True)
+        found.update(ProductCategory.objects.filter(name__in=missing).values_list('name', 'pk'))
+    return found
+
+
+def _merge_chunk(merchant_pk, rows):
+    """COPY ``rows`` into a temporary staging table and merge them into products in one statement.
+
+    Returns ``(created, updated, unpublished_ids)``.
+    """
+    products, addresses, merchants = Product._meta.db_table, Address._meta.db_table, Merchant._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE TEMP TABLE {STAGING_TABLE} '
+            '(name varchar(120), description text, category_id bigint, price numeric(10, 2), is_published boolean) '
+            'ON COMMIT DROP'
+        )
+        with cursor.cursor.copy(
+            f'COPY {STAGING_TABLE} (name, description, category_id, price, is_published) FROM STDIN'
+        ) as copy:
+            for row in rows:
+                copy.write_row(row)
+        cursor.execute(
+            f'INSERT INTO {products} AS p '
+            '(name, description, category_id, merchant_id, price, is_published, created_at, merchant_location) '
+            'SELECT s.name, s.description, s.category_id, %s, s.price, s.is_published, now(), '
+            f'(SELECT a.location::geography FROM {merchants} m JOIN {addresses} a ON a.id = m.address_id '
+            'WHERE m.id = %s) '
+            f'FROM {STAGING_TABLE} s '
+            'ON CONFLICT (name, merchant_id, category_id) DO UPDATE '
+            'SET description = EXCLUDED.description, price = EXCLUDED.price, is_published = EXCLUDED.is_published '
+            'RETURNING p.id, p.is_published, (xmax = 0)',
+            [merchant_pk, merchant_pk],
+        )
+        merged = cursor.fetchall()
+        # ON COMMIT DROP alone is not enough: inside a caller's transaction each chunk is only a savepoint,
+        # so the table would still exist when the next chunk creates it.
+        cursor.execute(f'DROP TABLE {STAGING_TABLE}')
+    created = sum(1 for _, _, inserted in merged if inserted)
+    return created, len(merged) - created, [pk for pk, published, _ in merged if not published]
+
+
+def import_catalog(merchant_pk, stream, fmt='csv', chunk_rows=None, create_categories=True):
+    """Stream a merchant's catalog into ``Product`` through COPY and a set-based merge.
+
+    Rows are ``name, category, price[, description, is_published]``. Each chunk is validated, has its
+    category names resolved in bulk, is de-duplicated on ``(name, category)`` (last row wins) and is
+    merged in its own transaction, updating products that already exist. Returns a report with
+    counts, throughput and up to ``MAX_REJECTS_REPORTED`` rejected rows (``{'line', 'error'}``).
+    """
+    chunk_rows = chunk_rows or settings.CATALOG_IMPORT_CHUNK_ROWS
+    report = {'read': 0, 'created': 0, 'updated': 0, 'rejected': 0, 'rejects': []}
+    merchant = Merchant.objects.select_related('address').get(pk=merchant_pk)
+    started = time.monotonic()
+
+    def reject(line, error):
+        report['rejected'] += 1
+        if len(report['rejects']) < MAX_REJECTS_REPORTED:
+            report['rejects'].append({'line': line, 'error': error})
+
+    rows = read_rows(stream, fmt)
+    while chunk := list(islice(rows, chunk_rows)):
+        report['read'] += len(chunk)
+        cleaned = []
+        for line, raw in chunk:
+            try:
+                cleaned.append((line, *_clean(raw)))
+            except ValueError as e:
+                reject(line, str(e))
+        categories = _resolve_categories({row[3] for row in cleaned}, create_categories)
+        unique = {}
+        for line, name, description, category, price, published in cleaned:
+            if category not in categories:
+                reject(line, f'unknown category {category!r}')
+                continue
+            key = (name, categories[category])
+            if key in unique:
+                reject(unique[key][0], f'duplicate of line {line}')
+            unique[key] = (line, (name, description, categories[category], price, published))
+        if not unique:
+            continue
+        with transaction.atomic():
+            created, updated, unpublished = _merge_chunk(merchant_pk, [row for _, row in unique.values()])
+            ZoneProduct.objects.filter(product_id__in=unpublished).delete()
+        report['created'] += created
+        report['updated'] += updated
+
+    zone_pks = list(merchant.delivery_zones.values_list('pk', flat=True))
+    if zone_pks:
+        from app.services import DeliveryZoneService
+
+        DeliveryZoneService.add_merchant_zones(merchant_pk, zone_pks)
+    # The merge bypasses model signals, so drop the merchant's cached product reads and nearby tiles here.
+    invalidate_tags(PRODUCTS_TAG, merchant_tag(merchant_pk))
+    location = merchant.address.location
+    invalidate_nearby_tiles(location.y, location.x)
+
+    elapsed = time.monotonic() - started
+    report['seconds'] = round(elapsed, 3)
+    report['rows_per_second'] = round(report['read'] / elapsed, 1) if elapsed else None
+    return report
+
+
+def import_catalog_file(merchant_pk, path, fmt=None, **kwargs):
+    fmt = fmt or ('ndjson' if path.endswith(('.ndjson', '.jsonl')) else 'csv')
+    with open(path, newline='' if fmt == 'csv' else None, encoding='utf-8-sig') as stream:
+        return import_catalog(merchant_pk, stream, fmt=fmt, **kwargs)
@@ -0,0 +1,170 @@
+import json
+import math
+import threading
+import time
+
+from django.conf import settings
+from django_redis import get_redis_connection
+
+from app.utils.geo import KM_PER_DEGREE_LAT, grid_cell, haversine_km
+
+# Redis GEO cannot index points closer to the poles than this.
+MAX_GEO_LAT = 85.05112878
+
+
+class GridCourierStore:
+    """In-process courier positions bucketed on a lat/lng grid; suitable for a single worker."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._positions = {}
+        self._cells = {}
+
+    def update_many(self, pings):
+        cell_deg = settings.COURIER_GRID_CELL_DEG
+        with self._lock:
+            for ping in pings:
+                old = self._positions.get(ping['id'])
+                if old is not None:
+                    self._cells.get(grid_cell(old['lat'], old['lng'], cell_deg), set()).discard(ping['id'])
+                self._positions[ping['id']] = ping
+                self._cells.setdefault(grid_cell(ping['lat'], ping['lng'], cell_deg), set()).add(ping['id'])
+
+    def within(self, lat, lng, radius_km):
+        cell_deg = settings.COURIER_GRID_CELL_DEG
+        cutoff = time.time() - settings.COURIER_POSITION_TTL
+        dlat = radius_km / KM_PER_DEGREE_LAT
+        dlng = min(dlat / max(math.cos(math.radians(min(abs(lat) + dlat, 89.0))), 1e-6), 180.0)
+        row_lo, col_lo = grid_cell(lat - dlat, lng - dlng, cell_deg)
+        row_hi, col_hi = grid_cell(lat + dlat, lng + dlng, cell_deg)
+        found = []
+        with self._lock:
+            for row in range(row_lo, row_hi + 1):
+                for col in range(col_lo, col_hi + 1):
+                    for courier_id in self._cells.get((row, col), ()):
+                        ping = self._positions[courier_id]
+                        if ping['ts'] >= cutoff and haversine_km(lat, lng, ping['lat'], ping['lng']) <= radius_km:
+                            found.append(ping)
+        return found
+
+    def purge_expired(self):
+        cell_deg = settings.COURIER_GRID_CELL_DEG
+        cutoff = time.time() - settings.COURIER_POSITION_TTL
+        with self._lock:
+            expired = [cid for cid, ping in self._positions.items() if ping['ts'] < cutoff]
+            for courier_id in expired:
+                ping = self._positions.pop(courier_id)
+                self._cells.get(grid_cell(ping['lat'], ping['lng'], cell_deg), set()).discard(courier_id)
+        return len(expired)
+
+
+class RedisCourierStore:
+    """Courier positions in a Redis GEO set shared by every worker.
+
+    Last-seen timestamps live in a sorted set so silent couriers can be filtered on read and
+    purged in bulk; per-courier attributes (load, heading) live in a hash.
+    """
+
+    GEO_KEY = 'couriers:geo'
+    SEEN_KEY = 'couriers:seen'
+    META_KEY = 'couriers:meta'
+
+    def _redis(self):
+        return get_redis_connection('default')
+
+    def update_many(self, pings):
+        if not pings:
+            return
+        geo = []
+        for ping in pings:
+            geo.extend((ping['lng'], ping['lat'], ping['id']))
+        pipe = self._redis().pipeline(transaction=False)
+        pipe.geoadd(self.GEO_KEY, geo)
+        pipe.zadd(self.SEEN_KEY, {ping['id']: ping['ts'] for ping in pings})
+        pipe.hset(
+            self.META_KEY,
+            mapping={ping['id']: json.dumps({'load': ping['load'], 'heading': ping['heading']}) for ping in pings},
+        )
+        pipe.execute()
+
+    def within(self, lat, lng, radius_km):
+        redis = self._redis()
+        hits = redis.geosearch(
+            self.GEO_KEY, longitude=lng, latitude=lat, radius=radius_km, unit='km', withcoord=True, sort='ASC'
+        )
+        if not hits:
+            return []
+        members = [member for member, _ in hits]
+        pipe = redis.pipeline(transaction=False)
+        pipe.zmscore(self.SEEN_KEY, members)
+        pipe.hmget(self.META_KEY, members)
+        seen, meta = pipe.execute()
+        cutoff = time.time() - settings.COURIER_POSITION_TTL
+        found = []
+        for (member, (c_lng, c_lat)), ts, attrs in zip(hits, seen, meta):
+            if ts is None or ts < cutoff:
+                continue
+            found.append(
+                {
+                    'id': member.decode(),
+                    'lat': c_lat,
+                    'lng': c_lng,
+                    'ts': ts,
+                    **(json.loads(attrs) if attrs else {}),
+                }
+            )
+        return found
+
+    def purge_expired(self):
+        redis = self._redis()
+        expired = redis.zrangebyscore(self.SEEN_KEY, '-inf', time.time() - settings.COURIER_POSITION_TTL)
+        if not expired:
+            return 0
+        pipe = redis.pipeline(transaction=False)
+        pipe.zrem(self.GEO_KEY, *expired)
+        pipe.zrem(self.SEEN_KEY, *expired)
+        pipe.hdel(self.META_KEY, *expired)
+        pipe.execute()
+        return len(expired)
+
+
+COURIER_STORE_BACKENDS = {'redis': RedisCourierStore, 'memory': GridCourierStore}
+_stores = {}
+
+
+def get_courier_store():
+    """Store selected by ``COURIER_STORE_BACKEND``; one instance per backend per process."""
+    backend = settings.COURIER_STORE_BACKEND
+    if backend not in _stores:
+        _stores[backend] = COURIER_STORE_BACKENDS[backend]()
+    return _stores[backend]
+
+
+def parse_pings(payload, now=None):
+    """Validate a batch of location pings, returning ``(pings, errors)`` with per-row errors.
+
+    Ids are kept as strings, which is how Redis stores them, so every backend reports the same id.
+    """
+    now = time.time() if now is None else now
+    pings, errors = [], []
+    for index, raw in enumerate(payload):
+        try:
+            if not isinstance(raw.get('id'), (int, str)):
+                raise ValueError('id must be an integer or string')
+            lat, lng = float(raw['lat']), float(raw['lng'])
+            if not (-MAX_GEO_LAT <= lat <= MAX_GEO_LAT and -180 <= lng <= 180):
+                raise ValueError('coordinates out of range')
+            heading = raw.get('heading')
+            pings.append(
+                {
+                    'id': str(raw['id']),
+                    'lat': lat,
+                    'lng': lng,
+                    'load': int(raw.get('load', 0)),
+                    'heading': None if heading is None else float(heading) % 360,
+                    'ts': min(float(raw.get('ts', now)), now),
+                }
+            )
+        except (KeyError, TypeError, ValueError, AttributeError) as e:
+            errors.append({'index': index, 'error': str(e)})
+    return pings, errors
@@ -0,0 +1,52 @@
+import numpy as np
+
+from app.utils.geo import bearing_deg_many, haversine_km_many
+
+DEFAULT_WEIGHTS = {'distance': 1.0, 'load': 0.0, 'heading': 0.0}
+
+
+def score_couriers(lat, lng, lats, lngs, loads=None, headings=None, weights=None):
+    """Score couriers for a pickup at ``(lat, lng)``; lower is better.
+
+    ``score = distance_km * w.distance + load * w.load + heading_penalty * w.heading`` where the heading
+    penalty is 0 when a courier already moves towards the pickup and 1 when it moves directly away.
+    Unknown headings (NaN) carry no penalty. Returns ``(scores, distances_km)``.
+    """
+    unknown = set(weights or ()) - DEFAULT_WEIGHTS.keys()
+    if unknown:
+        raise ValueError(f'Unknown scoring weights: {sorted(unknown)}')
+    w = {**DEFAULT_WEIGHTS, **(weights or {})}
+    lats = np.asarray(lats, dtype=float)
+    lngs = np.asarray(lngs, dtype=float)
+    distances = haversine_km_many(lat, lng, lats, lngs)
+    scores = distances * float(w['distance'])
+    if loads is not None and w['load']:
+        scores += np.asarray(loads, dtype=float) * float(w['load'])
+    if headings is not None and w['heading']:
+        turn = np.radians(np.asarray(headings, dtype=float) - bearing_deg_many(lats, lngs, lat, lng))
+        scores += np.nan_to_num((1 - np.cos(turn)) / 2) * float(w['heading'])
+    return scores, distances
+
+
+def top_k(scores, k):
+    """Indices of the ``k`` smallest scores, best first, without sorting the whole array."""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=int)
+    idx = np.argpartition(scores, k - 1)[:k]
+    return idx[np.argsort(scores[idx], kind='stable')]
+
+
+def rank_couriers(lat, lng, couriers, k=1, weights=None):
+    """Best ``k`` couriers from ``[{'id', 'lat', 'lng', 'load'?, 'heading'?}, ...]``, best first."""
+    if not couriers:
+        return []
+    loads = [c.get('load', 0) for c in couriers]
+    headings = [c.get('heading', np.nan) for c in couriers]
+    scores, distances = score_couriers(
+        lat, lng, [c['lat'] for c in couriers], [c['lng'] for c in couriers], loads, headings, weights
+    )
+    return [
+        {'courier_id': couriers[i]['id'], 'score': float(scores[i]), 'distance_km': float(distances[i])}
+        for i in top_k(scores, k)
+    ]
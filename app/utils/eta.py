@@ -0,0 +1,139 @@
+import asyncio
+import weakref
+
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+from app.models import Order
+from app.utils.cache import read_cache_key
+from app.utils.travel_matrix import get_travel_matrix
+
+
+class EtaProvider:
+    """Source of delivery ETAs; implementations talk to a routing service or compute locally.
+
+    ``batch_size`` is how many orders one provider call may answer; the client never sends more.
+    """
+
+    batch_size = 1
+
+    async def fetch(self, order_id):
+        """Return ``{'order': order_id, 'eta_minutes': int}``."""
+        raise NotImplementedError
+
+    async def fetch_many(self, order_ids):
+        return await asyncio.gather(*[self.fetch(oid) for oid in order_ids])
+
+
+class StubEtaProvider(EtaProvider):
+    """Fixed ETA after a short simulated network delay; used in development and tests."""
+
+    eta_minutes = 15
+
+    async def fetch(self, order_id):
+        await asyncio.sleep(settings.ETA_STUB_DELAY)
+        return {'order': order_id, 'eta_minutes': self.eta_minutes}
+
+
+class LocalEtaProvider(EtaProvider):
+    """ETAs from the precomputed travel-time matrix plus merchant prep time, one query per batch."""
+
+    batch_size = 10_000
+
+    async def fetch(self, order_id):
+        return (await self.fetch_many([order_id]))[0]
+
+    async def fetch_many(self, order_ids):
+        return await sync_to_async(self.eta_for_orders)(order_ids)
+
+    @staticmethod
+    def eta_for_orders(order_ids):
+        rows = Order.objects.filter(pk__in=order_ids).values_list(
+            'pk', 'merchant__address__location', 'address__location', 'merchant__prep_minutes'
+        )
+        found = {pk: (src, dst, prep) for pk, src, dst, prep in rows}
+        known = [oid for oid in order_ids if int(oid) in found]
+        points = [found[int(oid)] for oid in known]
+        seconds = get_travel_matrix().seconds(
+            [src.y for src, _, _ in points],
+            [src.x for src, _, _ in points],
+            [dst.y for _, dst, _ in points],
+            [dst.x for _, dst, _ in points],
+        )
+        minutes = np.ceil(seconds / 60) + np.array([prep for _, _, prep in points], dtype=float)
+        etas = {oid: int(m) for oid, m in zip(known, minutes)}
+        return [{'order': oid, 'eta_minutes': etas.get(oid)} for oid in order_ids]
+
+
+class _LoopState:
+    def __init__(self, limit):
+        self.semaphore = asyncio.Semaphore(limit)
+        self.inflight = {}
+
+
+class EtaClient:
+    """Bounded, cached and coalescing front for an ``EtaProvider``.
+
+    At most ``ETA_MAX_CONCURRENCY`` provider calls run at once per event loop, results are cached per
+    order for ``ETA_CACHE_TIMEOUT`` seconds, and concurrent requests for the same order share one call.
+    """
+
+    def __init__(self, provider=None):
+        self._provider = provider
+        self._loops = weakref.WeakKeyDictionary()
+
+    @property
+    def provider(self):
+        if self._provider is None:
+            self._provider = import_string(settings.ETA_PROVIDER)()
+        return self._provider
+
+    def _state(self):
+        loop = asyncio.get_running_loop()
+        if loop not in self._loops:
+            self._loops[loop] = _LoopState(settings.ETA_MAX_CONCURRENCY)
+        return self._loops[loop]
+
+    async def get(self, order_id):
+        return (await self.get_many([order_id]))[0]
+
+    async def get_many(self, order_ids):
+        keys = {oid: read_cache_key('eta', oid) for oid in order_ids}
+        found = await cache.aget_many(keys.values())
+        results = {oid: found[key] for oid, key in keys.items() if key in found}
+        state = self._state()
+        missing = [oid for oid in keys if oid not in results]
+        new = [oid for oid in missing if oid not in state.inflight]
+        if new:
+            task = asyncio.ensure_future(self._fetch_many(state, new, keys))
+            for oid in new:
+                state.inflight[oid] = task
+            task.add_done_callback(lambda done: self._forget(state, new, done))
+        tasks = {oid: state.inflight[oid] for oid in missing}
+        for oid, task in tasks.items():
+            results[oid] = (await asyncio.shield(task))[oid]
+        return [results[oid] for oid in order_ids]
+
+    @staticmethod
+    def _forget(state, order_ids, task):
+        for oid in order_ids:
+            if state.inflight.get(oid) is task:
+                del state.inflight[oid]
+
+    async def _fetch_many(self, state, order_ids, keys):
+        size = max(self.provider.batch_size, 1)
+
+        async def fetch_chunk(chunk):
+            async with state.semaphore:
+                return await self.provider.fetch_many(chunk)
+
+        chunks = await asyncio.gather(*[fetch_chunk(order_ids[i : i + size]) for i in range(0, len(order_ids), size)])
+        etas = {eta['order']: eta for chunk in chunks for eta in chunk}
+        await cache.aset_many({keys[oid]: eta for oid, eta in etas.items()}, timeout=settings.ETA_CACHE_TIMEOUT)
+        return etas
+
+
+eta_client = EtaClient()
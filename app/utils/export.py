@@ -0,0 +1,96 @@
+import csv
+import json
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.utils import timezone
+
+from app.models import Order
+from app.utils.render import drf_datetime, drf_decimal
+
+ORDER_FIELDS = ('id', 'user', 'merchant', 'address', 'status', 'total', 'created_at', 'updated_at')
+ITEM_FIELDS = ('id', 'product', 'quantity', 'unit_price', 'line_total')
+CSV_HEADER = ORDER_FIELDS + tuple(f'item_{name}' for name in ITEM_FIELDS)
+EXPORT_FORMATS = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+
+
+def order_export_rows(merchant_pk=None, status=None, start=None, end=None):
+    """Flat ``(order..., item...)`` tuples ordered by order then item, streamed from a server-side cursor.
+
+    ``start``/``end`` are inclusive local dates. Orders without items yield one row of ``None`` item columns.
+    """
+    qs = Order.objects.all()
+    if merchant_pk is not None:
+        qs = qs.filter(merchant_id=merchant_pk)
+    if status is not None:
+        qs = qs.filter(status=status)
+    if start is not None:
+        qs = qs.filter(created_at__gte=timezone.make_aware(datetime.combine(start, time.min)))
+    if end is not None:
+        qs = qs.filter(created_at__lt=timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min)))
+    return (
+        qs.order_by('pk', 'items__id')
+        .values_list(
+            'id',
+            'user_id',
+            'merchant_id',
+            'address_id',
+            'status',
+            'total',
+            'created_at',
+            'updated_at',
+            'items__id',
+            'items__product_id',
+            'items__quantity',
+            'items__unit_price',
+            'items__line_total',
+        )
+        .iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+    )
+
+
+def _value(value):
+    """Render like the DRF serializers: decimals as strings, UTC datetimes with a ``Z`` suffix."""
+    if isinstance(value, Decimal):
+        return drf_decimal(value)
+    if isinstance(value, datetime):
+        return drf_datetime(value)
+    return value
+
+
+def iter_ndjson(rows):
+    """One JSON object per order, shaped like ``OrderSerializer`` output, per line."""
+    order, items = None, []
+    for row in rows:
+        if order is not None and row[0] != order[0]:
+            yield _ndjson_line(order, items)
+            items = []
+        order = row[: len(ORDER_FIELDS)]
+        if row[len(ORDER_FIELDS)] is not None:
+            items.append(row[len(ORDER_FIELDS) :])
+    if order is not None:
+        yield _ndjson_line(order, items)
+
+
+def _ndjson_line(order, items):
+    record = {name: _value(value) for name, value in zip(ORDER_FIELDS, order)}
+    record['items'] = [{name: _value(value) for name, value in zip(ITEM_FIELDS, item)} for item in items]
+    return json.dumps(record, separators=(',', ':')) + '\n'
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows):
+    """One CSV row per order item, order columns repeated, with a header row."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(CSV_HEADER)
+    for row in rows:
+        yield writer.writerow([_value(value) for value in row])
+
+
+def iter_export(export_format, rows):
+    return iter_ndjson(rows) if export_format == 'ndjson' else iter_csv(rows)
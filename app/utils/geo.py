@@ -0,0 +1,70 @@
+import math
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = math.pi * EARTH_RADIUS_KM / 180
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance in kilometres between two WGS84 points."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def haversine_km_many(lat, lng, lats, lngs):
+    """Vectorised great-circle distance (km); arguments broadcast, so one-to-many and pairwise both work."""
+    phi1, phi2 = np.radians(lat), np.radians(lats)
+    dphi = phi2 - phi1
+    dlmb = np.radians(np.asarray(lngs) - lng)
+    a = np.sin(dphi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(1.0, np.sqrt(a)))
+
+
+def bearing_deg_many(lats, lngs, lat, lng):
+    """Initial bearing (degrees clockwise from north) from arrays of points towards one point."""
+    phi1, phi2 = np.radians(lats), np.radians(lat)
+    dlmb = np.radians(lng - np.asarray(lngs))
+    y = np.sin(dlmb) * np.cos(phi2)
+    x = np.cos(phi1) * np.sin(phi2) - np.sin(phi1) * np.cos(phi2) * np.cos(dlmb)
+    return np.degrees(np.arctan2(y, x)) % 360
+
+
+def grid_cell(lat, lng, cell_deg):
+    """Snap a point to the ``(row, col)`` of a regular lat/lng grid."""
+    return math.floor(lat / cell_deg), math.floor(lng / cell_deg)
+
+
+def cell_center(cell, cell_deg):
+    row, col = cell
+    return (row + 0.5) * cell_deg, (col + 0.5) * cell_deg
+
+
+def cell_half_diagonal_km(cell, cell_deg):
+    """Distance from the cell centre to its farthest corner."""
+    row, col = cell
+    lat, lng = cell_center(cell, cell_deg)
+    return max(haversine_km(lat, lng, corner * cell_deg, col * cell_deg) for corner in (row, row + 1))
+
+
+def cells_covering(lat, lng, radius_km, cell_deg):
+    """Cells whose ``radius_km`` + half-diagonal disc around the centre contains the point.
+
+    These are exactly the cells whose cached candidate sets may include something located at
+    ``(lat, lng)`` when each cell caches everything within ``radius_km`` of any point inside it.
+    """
+    margin_deg = radius_km / KM_PER_DEGREE_LAT + cell_deg
+    widest = math.cos(math.radians(min(abs(lat) + margin_deg, 89.0)))
+    lng_margin_deg = min(margin_deg / widest, 180.0)
+    row_lo, col_lo = grid_cell(lat - margin_deg, lng - lng_margin_deg, cell_deg)
+    row_hi, col_hi = grid_cell(lat + margin_deg, lng + lng_margin_deg, cell_deg)
+    cells = []
+    for row in range(row_lo, row_hi + 1):
+        for col in range(col_lo, col_hi + 1):
+            clat, clng = cell_center((row, col), cell_deg)
+            if haversine_km(lat, lng, clat, clng) <= radius_km + cell_half_diagonal_km((row, col), cell_deg):
+                cells.append((row, col))
+    return cells
@@ -0,0 +1,128 @@
+import json
+import logging
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+from django_redis import get_redis_connection
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = 'cache:invalidate'
+
+
+class LocalCache:
+    """Per-process LRU/TTL tier in front of the shared cache, bounded per namespace.
+
+    Only namespaces listed in ``LOCAL_CACHE_SIZES`` are kept. Entries are dropped when another
+    worker publishes their key on ``INVALIDATION_CHANNEL`` (see ``invalidate``), and in any case
+    after ``LOCAL_CACHE_TTL`` seconds, which bounds staleness if a message is missed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._epoch = 0
+        self._listener = None
+        self._pubsub_supported = True
+        self.stats = Counter()
+
+    @property
+    def epoch(self):
+        """Changes on every invalidation; capture before reading the shared cache and pass to ``set``."""
+        return self._epoch
+
+    def enabled(self, namespace):
+        return settings.LOCAL_CACHE_TTL > 0 and namespace in settings.LOCAL_CACHE_SIZES
+
+    def get(self, namespace, key):
+        """``(found, value)`` from this process's tier."""
+        if not self.enabled(namespace):
+            return False, None
+        self._ensure_listener()
+        with self._lock:
+            entries = self._entries.get(namespace)
+            item = entries.get(key) if entries else None
+            if item is None:
+                self.stats[namespace, 'miss'] += 1
+                return False, None
+            expires, value = item
+            if expires < time.monotonic():
+                del entries[key]
+                self.stats[namespace, 'expired'] += 1
+                return False, None
+            entries.move_to_end(key)
+            self.stats[namespace, 'hit'] += 1
+            return True, value
+
+    def set(self, namespace, key, value, epoch):
+        """Store unless an invalidation arrived since ``epoch`` (the value may predate it)."""
+        if not self.enabled(namespace):
+            return
+        with self._lock:
+            if epoch != self._epoch:
+                return
+            entries = self._entries.setdefault(namespace, OrderedDict())
+            entries[key] = (time.monotonic() + settings.LOCAL_CACHE_TTL, value)
+            entries.move_to_end(key)
+            while len(entries) > settings.LOCAL_CACHE_SIZES[namespace]:
+                entries.popitem(last=False)
+                self.stats[namespace, 'eviction'] += 1
+
+    def drop(self, keys):
+        """Forget ``keys`` in every namespace of this process."""
+        with self._lock:
+            self._epoch += 1
+            for namespace, entries in self._entries.items():
+                for key in keys:
+                    if entries.pop(key, None) is not None:
+                        self.stats[namespace, 'invalidation'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
+
+    def invalidate(self, keys):
+        """Drop ``keys`` here and tell every other worker to drop them too."""
+        keys = list(keys)
+        if not keys:
+            return
+        self.drop(keys)
+        if not settings.LOCAL_CACHE_SIZES:
+            return
+        try:
+            get_redis_connection('default').publish(INVALIDATION_CHANNEL, json.dumps(keys))
+        except NotImplementedError:
+            # Non-Redis cache backend: there is no shared channel, other workers rely on the TTL.
+            pass
+
+    def _ensure_listener(self):
+        if not self._pubsub_supported or (self._listener is not None and self._listener.is_alive()):
+            return
+        with self._lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(target=self._listen, name='local-cache-invalidation', daemon=True)
+                self._listener.start()
+
+    def _listen(self):
+        try:
+            pubsub = get_redis_connection('default').pubsub(ignore_subscribe_messages=True)
+        except NotImplementedError:
+            self._pubsub_supported = False
+            return
+        while True:
+            try:
+                pubsub.subscribe(INVALIDATION_CHANNEL)
+                # Anything published while we were not subscribed is lost; start from a clean slate.
+                self.clear()
+                for message in pubsub.listen():
+                    self.drop(json.loads(message['data']))
+            except Exception:
+                logger.exception('Local cache invalidation listener failed; clearing and resubscribing')
+                self.clear()
+                time.sleep(1)
+
+
+local_cache = LocalCache()
@@ -0,0 +1,18 @@
+from decimal import Decimal
+
+from django.utils import timezone
+
+
+def drf_datetime(value):
+    """``DateTimeField`` output: ISO 8601 in the current timezone, ``Z`` for UTC."""
+    if not value:
+        return None
+    value = timezone.localtime(value).isoformat()
+    return value[:-6] + 'Z' if value.endswith('+00:00') else value
+
+
+def drf_decimal(value, decimal_places=2):
+    """``DecimalField`` output with ``COERCE_DECIMAL_TO_STRING``: fixed-point, quantized to the field's places."""
+    if value is None:
+        return ''
+    return f'{Decimal(value).quantize(Decimal(1).scaleb(-decimal_places)):f}'
@@ -0,0 +1,123 @@
+import json
+import math
+import os
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.contrib.gis.geos import Polygon
+
+from app.utils.geo import haversine_km_many
+
+MAX_SECONDS = np.iinfo(np.uint16).max
+
+
+def travel_seconds(distance_km):
+    """Speed model: fixed handoff overhead plus detour-adjusted straight-line distance at average speed."""
+    moving = np.asarray(distance_km, dtype=float) * settings.TRAVEL_DETOUR_FACTOR / settings.TRAVEL_SPEED_KMH * 3600
+    return settings.TRAVEL_FIXED_SECONDS + moving
+
+
+def build_travel_matrix(areas, path=None):
+    """Precompute cell-to-cell travel times for the grid cells touching any of ``areas``.
+
+    Writes ``grid.npy`` (dense ``int32`` map from grid cell to matrix row, -1 where uncovered),
+    ``matrix.npy`` (``uint16`` seconds, row per origin cell) and ``meta.json`` under ``path``.
+    Returns the number of covered cells.
+    """
+    path = Path(path or settings.TRAVEL_MATRIX_DIR)
+    cell_deg = settings.TRAVEL_GRID_CELL_DEG
+    cells = set()
+    for area in areas:
+        prepared = area.prepared
+        xmin, ymin, xmax, ymax = area.extent
+        for row in range(math.floor(ymin / cell_deg), math.floor(ymax / cell_deg) + 1):
+            for col in range(math.floor(xmin / cell_deg), math.floor(xmax / cell_deg) + 1):
+                box = Polygon.from_bbox((col * cell_deg, row * cell_deg, (col + 1) * cell_deg, (row + 1) * cell_deg))
+                if prepared.intersects(box):
+                    cells.add((row, col))
+    if len(cells) > settings.TRAVEL_MATRIX_MAX_CELLS:
+        raise ValueError(f'{len(cells)} cells exceed TRAVEL_MATRIX_MAX_CELLS={settings.TRAVEL_MATRIX_MAX_CELLS}')
+    path.mkdir(parents=True, exist_ok=True)
+    # Files are written aside and renamed into place so workers mapping the old matrix keep a valid inode.
+    cells = sorted(cells)
+    rows = np.array([c[0] for c in cells], dtype=np.int64)
+    cols = np.array([c[1] for c in cells], dtype=np.int64)
+    row0, col0 = (int(rows.min()), int(cols.min())) if cells else (0, 0)
+    grid = np.full(((int(rows.max()) - row0 + 1, int(cols.max()) - col0 + 1) if cells else (0, 0)), -1, dtype=np.int32)
+    grid[rows - row0, cols - col0] = np.arange(len(cells), dtype=np.int32)
+    np.save(path / 'grid.tmp.npy', grid)
+
+    lats, lngs = (rows + 0.5) * cell_deg, (cols + 0.5) * cell_deg
+    matrix = np.lib.format.open_memmap(
+        path / 'matrix.tmp.npy', mode='w+', dtype=np.uint16, shape=(len(cells), len(cells))
+    )
+    for i in range(len(cells)):
+        matrix[i] = np.minimum(travel_seconds(haversine_km_many(lats[i], lngs[i], lats, lngs)), MAX_SECONDS)
+    matrix.flush()
+    del matrix
+    (path / 'meta.tmp.json').write_text(json.dumps({'cell_deg': cell_deg, 'row0': row0, 'col0': col0}))
+    for name in ('grid.npy', 'matrix.npy', 'meta.json'):
+        os.replace(path / name.replace('.', '.tmp.'), path / name)
+    return len(cells)
+
+
+class TravelMatrix:
+    """Memory-mapped cell-to-cell travel times; points outside the covered cells use the speed model."""
+
+    def __init__(self, path=None):
+        path = Path(path or settings.TRAVEL_MATRIX_DIR)
+        self.grid = self.matrix = None
+        self.version = _meta_mtime(path)
+        if self.version is not None:
+            meta = json.loads((path / 'meta.json').read_text())
+            self.cell_deg, self.row0, self.col0 = meta['cell_deg'], meta['row0'], meta['col0']
+            self.grid = np.load(path / 'grid.npy')
+            self.matrix = np.load(path / 'matrix.npy', mmap_mode='r')
+
+    def _cell_index(self, lats, lngs):
+        rows = np.floor(lats / self.cell_deg).astype(np.int64) - self.row0
+        cols = np.floor(lngs / self.cell_deg).astype(np.int64) - self.col0
+        inside = (rows >= 0) & (rows < self.grid.shape[0]) & (cols >= 0) & (cols < self.grid.shape[1])
+        idx = np.full(len(lats), -1, dtype=np.int64)
+        idx[inside] = self.grid[rows[inside], cols[inside]]
+        return idx
+
+    def seconds(self, src_lats, src_lngs, dst_lats, dst_lngs):
+        """Travel seconds for each origin/destination pair, vectorised over the arrays."""
+        src_lats, src_lngs = np.asarray(src_lats, dtype=float), np.asarray(src_lngs, dtype=float)
+        dst_lats, dst_lngs = np.asarray(dst_lats, dtype=float), np.asarray(dst_lngs, dtype=float)
+        result = np.empty(len(src_lats), dtype=float)
+        covered = np.zeros(len(src_lats), dtype=bool)
+        if self.matrix is not None and len(src_lats):
+            src, dst = self._cell_index(src_lats, src_lngs), self._cell_index(dst_lats, dst_lngs)
+            covered = (src >= 0) & (dst >= 0)
+            result[covered] = self.matrix[src[covered], dst[covered]]
+        rest = ~covered
+        if rest.any():
+            dist = haversine_km_many(src_lats[rest], src_lngs[rest], dst_lats[rest], dst_lngs[rest])
+            result[rest] = travel_seconds(dist)
+        return result
+
+
+def _meta_mtime(path):
+    try:
+        return (path / 'meta.json').stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+_matrix = None
+
+
+def get_travel_matrix():
+    """Per-process matrix, reopened when ``build_travel_matrix`` has replaced the files."""
+    global _matrix
+    if _matrix is None or _matrix.version != _meta_mtime(Path(settings.TRAVEL_MATRIX_DIR)):
+        _matrix = TravelMatrix()
+    return _matrix
+
+
+def reset_travel_matrix():
+    global _matrix
+    _matrix = None
@@ -0,0 +1,127 @@
+import math
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.gis.geos import Point
+from django.utils import timezone
+
+from app.models import DeliveryZone, Merchant
+from app.utils.cache import ZONES_TAG, tag_versions
+
+# Rows updated this close to the previous load are re-read to tolerate clock skew between hosts.
+RELOAD_OVERLAP = timedelta(seconds=1)
+# Zones whose bounding box spans more grid cells than this are kept in a short list checked for every point.
+MAX_CELLS_PER_ZONE = 4096
+
+
+class ZoneIndex:
+    """Per-process spatial index of prepared ``DeliveryZone.area`` geometries.
+
+    Zone bounding boxes are bucketed on a regular grid and exact containment is checked with GEOS
+    prepared geometries, so a lookup costs a dict probe plus a few point-in-polygon tests and no
+    database round trip. The index reloads incrementally when the ``zones`` cache tag is bumped.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._zones = {}
+        self._cells = {}
+        self._oversized = set()
+        self._merchant_zones = {}
+        self._version = None
+        self._loaded_at = None
+        self._checked_at = -math.inf
+
+    def mark_stale(self):
+        """Force a version check on the next lookup (used by this process's own signal handlers)."""
+        self._checked_at = -math.inf
+
+    def zones_for_point(self, lat, lng):
+        self._ensure_fresh()
+        return self._lookup(lat, lng)
+
+    def zones_for_points(self, points):
+        """Batch variant of ``zones_for_point`` for an iterable of ``(lat, lng)`` pairs."""
+        self._ensure_fresh()
+        return [self._lookup(lat, lng) for lat, lng in points]
+
+    def merchant_serves(self, merchant_pk, lat, lng):
+        """Whether a merchant delivers to the point; merchants without zones are unrestricted."""
+        self._ensure_fresh()
+        zones = self._merchant_zones.get(merchant_pk)
+        if not zones:
+            return True
+        return not zones.isdisjoint(self._lookup(lat, lng))
+
+    def _lookup(self, lat, lng):
+        cell = self._cell(lat, lng)
+        candidates = self._cells.get(cell, set()) | self._oversized
+        if not candidates:
+            return set()
+        point = Point(lng, lat, srid=4326)
+        hits = set()
+        for pk in candidates:
+            zone = self._zones.get(pk)
+            if zone is None:
+                continue
+            (xmin, ymin, xmax, ymax), prepared = zone
+            if xmin <= lng <= xmax and ymin <= lat <= ymax and prepared.contains(point):
+                hits.add(pk)
+        return hits
+
+    def _cell(self, lat, lng):
+        size = settings.ZONE_INDEX_CELL_DEG
+        return math.floor(lat / size), math.floor(lng / size)
+
+    def _ensure_fresh(self):
+        now = time.monotonic()
+        if now - self._checked_at < settings.ZONE_INDEX_REFRESH_SECONDS:
+            return
+        self._checked_at = now
+        version = tag_versions([ZONES_TAG])[ZONES_TAG]
+        if version == self._version:
+            return
+        with self._lock:
+            if version != self._version:
+                self._reload()
+                self._version = version
+
+    def _reload(self):
+        started = timezone.now()
+        changed = DeliveryZone.objects.only('pk', 'area')
+        if self._loaded_at is not None:
+            changed = changed.filter(updated_at__gte=self._loaded_at - RELOAD_OVERLAP)
+        zones = dict(self._zones)
+        for zone in changed:
+            prepared = zone.area.prepared
+            # Build the prepared geometry's internal index now rather than racing on first use.
+            prepared.contains(zone.area.point_on_surface)
+            zones[zone.pk] = (zone.area.extent, prepared)
+        live = set(DeliveryZone.objects.values_list('pk', flat=True))
+        zones = {pk: zone for pk, zone in zones.items() if pk in live}
+
+        cells, oversized = {}, set()
+        for pk, ((xmin, ymin, xmax, ymax), _) in zones.items():
+            row_lo, col_lo = self._cell(ymin, xmin)
+            row_hi, col_hi = self._cell(ymax, xmax)
+            if (row_hi - row_lo + 1) * (col_hi - col_lo + 1) > MAX_CELLS_PER_ZONE:
+                oversized.add(pk)
+                continue
+            for row in range(row_lo, row_hi + 1):
+                for col in range(col_lo, col_hi + 1):
+                    cells.setdefault((row, col), set()).add(pk)
+
+        merchant_zones = {}
+        for merchant_pk, zone_pk in Merchant.delivery_zones.through.objects.values_list(
+            'merchant_id', 'deliveryzone_id'
+        ):
+            merchant_zones.setdefault(merchant_pk, set()).add(zone_pk)
+
+        self._zones, self._cells, self._oversized = zones, cells, oversized
+        self._merchant_zones = merchant_zones
+        self._loaded_at = started
+
+
+zone_index = ZoneIndex()
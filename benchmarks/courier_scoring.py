@@ -0,0 +1,64 @@
+"""Latency of courier ranking for PriorityAssignmentView.
+
+Compares the vectorised NumPy scorer with a per-courier Python loop that sorts the full list,
+which is the shape of the previous implementation. Run with ``make bench`` or
+``python -m benchmarks.courier_scoring``.
+"""
+
+import math
+import random
+import statistics
+import time
+
+from app.utils.dispatch import rank_couriers
+from app.utils.geo import haversine_km
+
+PICKUP = (52.52, 13.405)
+SIZES = (10_000, 100_000)
+REPEATS = 5
+
+
+def make_couriers(n, seed=1):
+    rnd = random.Random(seed)
+    return [
+        {
+            'id': i,
+            'lat': PICKUP[0] + rnd.uniform(-0.3, 0.3),
+            'lng': PICKUP[1] + rnd.uniform(-0.5, 0.5),
+            'load': rnd.randint(0, 3),
+            'heading': rnd.uniform(0, 360),
+        }
+        for i in range(n)
+    ]
+
+
+def loop_rank(lat, lng, couriers):
+    scored = [{'courier_id': c['id'], 'score': haversine_km(lat, lng, c['lat'], c['lng'])} for c in couriers]
+    return sorted(scored, key=lambda x: x['score'])[0]
+
+
+def timed(fn):
+    samples = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    weights = {'distance': 1.0, 'load': 0.5, 'heading': 0.25}
+    print(f'{"couriers":>10} {"loop+sort ms":>14} {"numpy top-1 ms":>16} {"numpy top-10 weighted ms":>26}')
+    for n in SIZES:
+        couriers = make_couriers(n)
+        loop_ms = timed(lambda: loop_rank(*PICKUP, couriers))
+        top1_ms = timed(lambda: rank_couriers(*PICKUP, couriers, k=1))
+        top10_ms = timed(lambda: rank_couriers(*PICKUP, couriers, k=10, weights=weights))
+        print(f'{n:>10} {loop_ms:>14.1f} {top1_ms:>16.1f} {top10_ms:>26.1f}')
+    assert math.isclose(
+        loop_rank(*PICKUP, couriers)['score'], rank_couriers(*PICKUP, couriers)[0]['distance_km'], rel_tol=1e-9
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""Checkout throughput for one flash-sale SKU: single inventory row lock vs hot-SKU shards.
+
+Each worker thread runs checkouts that decrement the SKU and then hold the transaction open for
+``HOLD_SECONDS`` (standing in for writing the order and its items), which is what makes every
+other checkout queue on the row lock. Needs the configured PostgreSQL database; every fixture row
+(user, address, merchant, category, product and stock) is deleted afterwards, also on failure.
+Run with ``make bench-stock`` or ``python -m benchmarks.hot_stock``.
+"""
+
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.contrib.gis.geos import Point  # noqa: E402
+from django.db import connection, transaction  # noqa: E402
+
+from app.models import Address, Inventory, ProductCategory  # noqa: E402
+from app.services import InventoryService, MerchantService, ProductService  # noqa: E402
+
+WORKERS = 32
+CHECKOUTS = 2_000
+STOCK = 1_500
+HOLD_SECONDS = 0.002
+SHARDS = (0, 8, 32)
+
+
+def checkout(key):
+    try:
+        with transaction.atomic():
+            InventoryService.decrement_stock_many({key: 1})
+            time.sleep(HOLD_SECONDS)
+        return True
+    except ValueError:
+        return False
+    finally:
+        connection.close()
+
+
+def run(shards):
+    suffix = uuid.uuid4().hex[:8]
+    user = User.objects.create_user(username=f'bench-{suffix}', password='pw')
+    address = Address.objects.create(
+        line1='Bench', line2='', city='B', state='', postal_code='0', country='C', location=Point(0, 0)
+    )
+    category = ProductCategory.objects.create(name=f'Bench {suffix}')
+    try:
+        merchant = MerchantService.create_merchant(user, f'Bench {suffix}', address, categories=[category])
+        product = ProductService.create_product(merchant, 'Flash sale item', category, 1)
+        inventory = InventoryService.set_stock(merchant, product, STOCK)
+        if shards:
+            InventoryService.set_hot_mode(inventory.pk, shards)
+        key = (merchant.pk, product.pk)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(WORKERS) as pool:
+            sold = sum(pool.map(checkout, [key] * CHECKOUTS))
+        elapsed = time.perf_counter() - start
+        InventoryService.reconcile_hot_stock()
+        left = Inventory.objects.get(pk=inventory.pk).stock
+        assert sold == STOCK and left == 0, f'sold {sold}, left {left}: stock accounting is off'
+        return CHECKOUTS / elapsed
+    finally:
+        # The address cascades to the merchant and its product, inventory and shards, which frees the category.
+        address.delete()
+        category.delete()
+        user.delete()
+
+
+def main():
+    print(f'{WORKERS} workers, {CHECKOUTS} checkouts for {STOCK} units, {HOLD_SECONDS * 1000:.0f} ms per order')
+    print(f'{"mode":>12} {"checkouts/s":>12} {"speedup":>9}')
+    baseline = None
+    for shards in SHARDS:
+        rate = run(shards)
+        baseline = baseline or rate
+        mode = f'{shards} shards' if shards else 'row lock'
+        print(f'{mode:>12} {rate:>12.0f} {rate / baseline:>8.1f}x')
+
+
+if __name__ == '__main__':
+    main()
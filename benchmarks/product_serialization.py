@@ -0,0 +1,83 @@
+"""Per-item cost of rendering product listings.
+
+Compares ``ProductSerializer(many=True)`` + ``JSONRenderer`` over model instances with the projection
+path (``values()`` rows -> ``product_representation`` -> ``ORJSONRenderer``) used by the product list
+and nearby endpoints. Both run on in-memory data, so only serialization is measured. Run with
+``make bench`` or ``python -m benchmarks.product_serialization``.
+"""
+
+import os
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from app.api.renderers import ORJSONRenderer  # noqa: E402
+from app.api.serializers import PRODUCT_COLUMNS, ProductSerializer, product_representation  # noqa: E402
+from app.models import Product  # noqa: E402
+
+SIZES = (100, 1_000, 10_000)
+REPEATS = 5
+
+
+def make_rows(n, seed=1):
+    rnd = random.Random(seed)
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    return [
+        dict(
+            zip(
+                PRODUCT_COLUMNS,
+                (
+                    i,
+                    f'Product {i}',
+                    'Lorem ipsum ' * rnd.randint(0, 20),
+                    rnd.randint(1, 50),
+                    rnd.randint(1, 500),
+                    Decimal(rnd.randint(1, 99_999)) / 100,
+                    True,
+                    start + timedelta(seconds=i, microseconds=rnd.randint(0, 999_999)),
+                ),
+            )
+        )
+        for i in range(n)
+    ]
+
+
+def serializer_path(products):
+    return JSONRenderer().render(ProductSerializer(products, many=True).data)
+
+
+def projection_path(rows):
+    return ORJSONRenderer().render([product_representation(row) for row in rows])
+
+
+def timed(fn):
+    samples = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    print(f'{"items":>8} {"serializer us/item":>20} {"projection us/item":>20} {"speedup":>9}')
+    for n in SIZES:
+        rows = make_rows(n)
+        products = [Product(**row) for row in rows]
+        assert serializer_path(products) == projection_path(rows)
+        slow = timed(lambda: serializer_path(products)) / n * 1e6
+        fast = timed(lambda: projection_path(rows)) / n * 1e6
+        print(f'{n:>8} {slow:>20.2f} {fast:>20.2f} {slow / fast:>8.1f}x')
+
+
+if __name__ == '__main__':
+    main()
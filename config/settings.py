@@ -25,6 +25,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'django.contrib.gis',
+    'django.contrib.postgres',
     # Third-party apps
     'rest_framework',
     'django_redis',
@@ -117,10 +118,92 @@ REST_FRAMEWORK = {
 }
 
 
+# Delivery zones are split into parts of at most this many vertices for cheap containment checks.
+ZONE_SUBDIVIDE_MAX_VERTICES = env.int('ZONE_SUBDIVIDE_MAX_VERTICES', default=64)
+ZONE_PRODUCTS_PAGE_SIZE = env.int('ZONE_PRODUCTS_PAGE_SIZE', default=50)
+# Per-worker zone index: grid bucket size and how often other workers' zone changes are picked up.
+ZONE_INDEX_CELL_DEG = env.float('ZONE_INDEX_CELL_DEG', default=0.05)
+ZONE_INDEX_REFRESH_SECONDS = env.float('ZONE_INDEX_REFRESH_SECONDS', default=5.0)
+
+# Live courier positions: 'redis' (GEO set shared by all workers) or 'memory' (per-process grid).
+COURIER_STORE_BACKEND = env('COURIER_STORE_BACKEND', default='redis')
+COURIER_POSITION_TTL = env.int('COURIER_POSITION_TTL', default=120)
+COURIER_GRID_CELL_DEG = env.float('COURIER_GRID_CELL_DEG', default=0.01)
+COURIER_SEARCH_RADIUS_KM = env.float('COURIER_SEARCH_RADIUS_KM', default=5.0)
+COURIER_PING_MAX_BATCH = env.int('COURIER_PING_MAX_BATCH', default=5000)
+# Most ranked candidates one priority-assignment request may ask for (k).
+COURIER_MAX_CANDIDATES = env.int('COURIER_MAX_CANDIDATES', default=50)
+
+# Delivery ETAs: provider class, concurrency bound per event loop, per-order cache TTL and batch cap.
+ETA_PROVIDER = env('ETA_PROVIDER', default='app.utils.eta.StubEtaProvider')
+ETA_MAX_CONCURRENCY = env.int('ETA_MAX_CONCURRENCY', default=20)
+ETA_CACHE_TIMEOUT = env.int('ETA_CACHE_TIMEOUT', default=30)
+ETA_MAX_ORDERS = env.int('ETA_MAX_ORDERS', default=500)
+ETA_STUB_DELAY = env.float('ETA_STUB_DELAY', default=0.1)
+
+# Local travel-time engine (app.utils.eta.LocalEtaProvider): grid over delivery zones and speed model.
+TRAVEL_MATRIX_DIR = env('TRAVEL_MATRIX_DIR', default=str(BASE_DIR / 'var' / 'travel_matrix'))
+TRAVEL_GRID_CELL_DEG = env.float('TRAVEL_GRID_CELL_DEG', default=0.01)
+TRAVEL_MATRIX_MAX_CELLS = env.int('TRAVEL_MATRIX_MAX_CELLS', default=8000)
+TRAVEL_SPEED_KMH = env.float('TRAVEL_SPEED_KMH', default=20.0)
+TRAVEL_DETOUR_FACTOR = env.float('TRAVEL_DETOUR_FACTOR', default=1.3)
+TRAVEL_FIXED_SECONDS = env.int('TRAVEL_FIXED_SECONDS', default=120)
+# Bulk inventory sync: rows per INSERT ... ON CONFLICT statement, and payloads above this many rows are
+# handed to a Celery task instead of being applied within the request.
+INVENTORY_BULK_BATCH_SIZE = env.int('INVENTORY_BULK_BATCH_SIZE', default=5000)
+INVENTORY_BULK_SYNC_MAX_ROWS = env.int('INVENTORY_BULK_SYNC_MAX_ROWS', default=5000)
+# Hot-SKU mode: default number of stock sub-counters per flagged inventory row, and how often the beat
+# task folds their totals back into Inventory.stock.
+INVENTORY_HOT_SHARDS = env.int('INVENTORY_HOT_SHARDS', default=8)
+INVENTORY_HOT_RECONCILE_SECONDS = env.float('INVENTORY_HOT_RECONCILE_SECONDS', default=5.0)
+# Checkout stock reservations: default and maximum hold time, and how often / in what batch size the
+# beat sweeper hands expired holds back to inventory.
+RESERVATION_TTL_SECONDS = env.int('RESERVATION_TTL_SECONDS', default=600)
+RESERVATION_MAX_TTL_SECONDS = env.int('RESERVATION_MAX_TTL_SECONDS', default=1800)
+RESERVATION_SWEEP_SECONDS = env.float('RESERVATION_SWEEP_SECONDS', default=30.0)
+RESERVATION_SWEEP_BATCH_SIZE = env.int('RESERVATION_SWEEP_BATCH_SIZE', default=500)
+# Rows fetched per server-side cursor round trip by the order export.
+EXPORT_CHUNK_SIZE = env.int('EXPORT_CHUNK_SIZE', default=2000)
+# Rows validated, COPYed and merged per transaction by the catalog import.
+CATALOG_IMPORT_CHUNK_ROWS = env.int('CATALOG_IMPORT_CHUNK_ROWS', default=10000)
+
+
 CACHES = {'default': env.cache('CACHE_URL', default='redis://localhost:6379/0')}
 SESSION_ENGINE = 'django.contrib.sessions.backends.cache'
 SESSION_CACHE_ALIAS = 'default'
 
+# Nearby product search is cached per grid tile; searches wider than the max radius bypass the cache.
+NEARBY_TILE_DEG = env.float('NEARBY_TILE_DEG', default=0.02)
+NEARBY_MAX_RADIUS_KM = env.float('NEARBY_MAX_RADIUS_KM', default=10.0)
+NEARBY_TILE_TIMEOUT = env.int('NEARBY_TILE_TIMEOUT', default=120)
+NEARBY_MAX_LIMIT = env.int('NEARBY_MAX_LIMIT', default=100)
+# Equal-width price buckets in the nearby search facets (?facets=1).
+NEARBY_FACETS_PRICE_BUCKETS = env.int('NEARBY_FACETS_PRICE_BUCKETS', default=8)
+# Page size and cap for merchants delivering to a point (/api/merchants/nearby/).
+MERCHANTS_NEARBY_PAGE_SIZE = env.int('MERCHANTS_NEARBY_PAGE_SIZE', default=20)
+MERCHANTS_NEARBY_MAX_PAGE_SIZE = env.int('MERCHANTS_NEARBY_MAX_PAGE_SIZE', default=100)
+# Most names one product autocomplete response may return.
+AUTOCOMPLETE_MAX_LIMIT = env.int('AUTOCOMPLETE_MAX_LIMIT', default=20)
+# Read-through ViewSet cache; entries are invalidated by tag generation bumps, the TTL is a backstop.
+READ_CACHE_TIMEOUT = env.int('READ_CACHE_TIMEOUT', default=300)
+# Cached response bodies and tiles at least this large are stored zlib-compressed.
+CACHE_COMPRESS_MIN_BYTES = env.int('CACHE_COMPRESS_MIN_BYTES', default=1024)
+CACHE_COMPRESS_LEVEL = env.int('CACHE_COMPRESS_LEVEL', default=6)
+# Stampede protection (app.utils.cache.get_or_compute): recompute lock lifetime, how long a request with
+# nothing to serve waits for the lock holder, how long expired values stay servable while one worker
+# recomputes, and the early-refresh aggressiveness (0 disables it).
+CACHE_LOCK_TIMEOUT = env.int('CACHE_LOCK_TIMEOUT', default=10)
+CACHE_LOCK_WAIT = env.float('CACHE_LOCK_WAIT', default=2.0)
+CACHE_LOCK_POLL = env.float('CACHE_LOCK_POLL', default=0.05)
+CACHE_STALE_SECONDS = env.int('CACHE_STALE_SECONDS', default=60)
+CACHE_EARLY_EXPIRY_BETA = env.float('CACHE_EARLY_EXPIRY_BETA', default=1.0)
+# Per-process tier in front of Redis (app.utils.local_cache): max entries per namespace (absent = not kept
+# locally) and a TTL bounding staleness should a pub/sub invalidation be missed; 0 disables the tier.
+LOCAL_CACHE_SIZES = env.dict(
+    'LOCAL_CACHE_SIZES', cast={'value': int}, default={'tag': 10000, 'read': 2000, 'nearby_tile': 256}
+)
+LOCAL_CACHE_TTL = env.float('LOCAL_CACHE_TTL', default=5.0)
+
 CELERY_BROKER_URL = env('CELERY_BROKER_URL', default='redis://cache:6379/0')
 CELERY_RESULT_BACKEND = env('CELERY_RESULT_BACKEND', default=CELERY_BROKER_URL)
 CELERY_ACCEPT_CONTENT = ['json']
@@ -128,7 +211,20 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
 CELERY_TASK_DEFAULT_QUEUE = env('CELERY_DEFAULT_QUEUE', default='default')
-CELERY_BEAT_SCHEDULE = {}
+CELERY_BEAT_SCHEDULE = {
+    'purge-expired-courier-positions': {
+        'task': 'app.purge_expired_courier_positions',
+        'schedule': 60.0,
+    },
+    'reconcile-hot-stock': {
+        'task': 'app.reconcile_hot_stock',
+        'schedule': INVENTORY_HOT_RECONCILE_SECONDS,
+    },
+    'release-expired-reservations': {
+        'task': 'app.release_expired_reservations',
+        'schedule': RESERVATION_SWEEP_SECONDS,
+    },
+}
 
 
 LOGGING = {
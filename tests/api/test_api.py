@@ -1,10 +1,31 @@
+import csv
+import json
+import zlib
+from datetime import timedelta
+from unittest.mock import Mock
+
 import pytest
 from django.contrib.auth.models import User
-from django.contrib.gis.geos import Point
+from django.contrib.gis.geos import Point, Polygon
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
 
-from app.models import Address, Merchant, Order, OrderItem, Product, ProductCategory
+from app.api.pagination import encode_cursor
+from app.api.serializers import ProductSerializer
+from app.models import (
+    Address,
+    DeliveryZone,
+    Inventory,
+    Merchant,
+    Order,
+    OrderItem,
+    Product,
+    ProductCategory,
+    StockReservation,
+)
+from app.services import MerchantService, OrderService, ProductService, ReservationService, SalesRollupService
 
 pytestmark = pytest.mark.django_db
 
@@ -71,11 +92,19 @@ def test_order_analytics(api_client):
     prod = Product.objects.create(name='Banana', description='Win', category=cat, merchant=merchant, price=1.5)
     order = Order.objects.create(user=user, merchant=merchant, address=addr, status='fulfilled', total=12)
     OrderItem.objects.create(order=order, product=prod, quantity=6, unit_price=1.5, line_total=9)
+    SalesRollupService.rebuild()
     url = reverse('api:order-analytics')
     resp = api_client.get(url)
     assert resp.status_code == 200
     assert any('Banana' in str(r.get('product__name')) for r in resp.data)
 
+    today = order.created_at.date()
+    resp = api_client.get(url, {'merchant': merchant.pk, 'start': today.isoformat(), 'end': today.isoformat()})
+    assert [r['product__name'] for r in resp.data] == ['Banana']
+    resp = api_client.get(url, {'merchant': merchant.pk, 'end': (today - timedelta(days=1)).isoformat()})
+    assert resp.data == []
+    assert api_client.get(url, {'start': 'yesterday'}).status_code == 400
+
 
 def test_priority_assignment_api(api_client):
     user = User.objects.create_user(username='de', password='pw')
@@ -121,3 +150,424 @@ def test_auth_required_for_post_endpoints(api_client):
     # Unauthenticated POST to /api/orders/ should return 401
     resp2 = api_client.post(reverse('api:order-list'), data={}, format='json')
     assert resp2.status_code == 401
+
+
+def test_cart_checkout_splits_orders_per_merchant(authenticated_api_client, user, stocked_product):
+    p1 = stocked_product('cart-m1', Point(1, 1), stock=5)
+    p2 = stocked_product('cart-m2', Point(2, 2), stock=5)
+    url = reverse('api:cart-checkout')
+    data = {
+        'address': p1.merchant.address_id,
+        'items': [{'product': p1.pk, 'quantity': 2}, {'product': p2.pk, 'quantity': 3}],
+    }
+    resp = authenticated_api_client.post(url, data, format='json')
+    assert resp.status_code == status.HTTP_201_CREATED
+    assert {o['merchant'] for o in resp.data} == {p1.merchant_id, p2.merchant_id}
+    assert Order.objects.filter(user=user).count() == 2
+    assert sorted(Inventory.objects.values_list('stock', flat=True)) == [2, 3]
+
+
+def test_cart_checkout_is_all_or_nothing(authenticated_api_client, user, stocked_product):
+    p1 = stocked_product('cart-m3', Point(1, 1), stock=5)
+    p2 = stocked_product('cart-m4', Point(2, 2), stock=1)
+    url = reverse('api:cart-checkout')
+    data = {
+        'address': p1.merchant.address_id,
+        'items': [{'product': p1.pk, 'quantity': 2}, {'product': p2.pk, 'quantity': 3}],
+    }
+    resp = authenticated_api_client.post(url, data, format='json')
+    assert resp.status_code == status.HTTP_400_BAD_REQUEST
+    assert not Order.objects.filter(user=user).exists()
+    assert sorted(Inventory.objects.values_list('stock', flat=True)) == [1, 5]
+
+
+def test_nearby_products_tile_filters_exact_radius(api_client):
+    cat = ProductCategory.objects.create(name='Tiles')
+    for username, lat in (('tile-near', 20.0), ('tile-far', 20.05)):
+        user = User.objects.create_user(username=username, password='pw')
+        addr = Address.objects.create(
+            line1=username, line2='', city='T', state='', postal_code='1', country='T', location=Point(20, lat)
+        )
+        merchant = Merchant.objects.create(user=user, name=username, address=addr)
+        Product.objects.create(name=f'{username}-prod', category=cat, merchant=merchant, price=1)
+    url = reverse('api:product-nearby')
+    resp = api_client.get(url, {'lat': 20.0, 'lng': 20.0, 'radius': 2})
+    assert [p['name'] for p in resp.data] == ['tile-near-prod']
+    resp = api_client.get(url, {'lat': 20.001, 'lng': 20.001, 'radius': 8})
+    assert [p['name'] for p in resp.data] == ['tile-near-prod', 'tile-far-prod']
+    resp = api_client.get(url, {'lat': 20.0, 'lng': 20.0, 'radius': 8, 'product_name': 'FAR'})
+    assert [p['name'] for p in resp.data] == ['tile-far-prod']
+
+
+def test_product_and_inventory_reads_invalidated_on_change(api_client, stocked_product):
+    product = stocked_product('cache-rt', Point(3, 3), stock=4)
+    detail = reverse('api:product-detail', args=[product.pk])
+    assert api_client.get(detail).data['is_published'] is True
+    ProductService.unpublish_product(product)
+    assert api_client.get(detail).data['is_published'] is False
+
+    inventories = reverse('api:inventory-list')
+    assert api_client.get(inventories).data['results'][0]['stock'] == 4
+    OrderService.place_order(product.merchant.user, product.merchant, product.merchant.address, [(product, 3)])
+    assert api_client.get(inventories).data['results'][0]['stock'] == 1
+
+
+def test_nearby_products_knn_mode_returns_nearest_n(api_client):
+    cat = ProductCategory.objects.create(name='Knn')
+    for i, lat in enumerate((30.03, 30.01, 30.02, 31.0)):
+        user = User.objects.create_user(username=f'knn-{i}', password='pw')
+        addr = Address.objects.create(
+            line1='K', line2='', city='K', state='', postal_code='1', country='K', location=Point(30, lat)
+        )
+        merchant = Merchant.objects.create(user=user, name=f'knn-{i}', address=addr)
+        Product.objects.create(name=f'knn-{i}', category=cat, merchant=merchant, price=1)
+    url = reverse('api:product-nearby')
+    resp = api_client.get(url, {'lat': 30.0, 'lng': 30.0, 'radius': 20, 'mode': 'knn', 'limit': 2})
+    assert [p['name'] for p in resp.data] == ['knn-1', 'knn-2']
+    resp = api_client.get(url, {'lat': 30.0, 'lng': 30.0, 'radius': 50, 'mode': 'knn', 'limit': 10})
+    assert [p['name'] for p in resp.data] == ['knn-1', 'knn-2', 'knn-0']
+    resp = api_client.get(url, {'lat': 30.0, 'lng': 30.0, 'radius': 20, 'mode': 'knn', 'limit': -1})
+    assert [p['name'] for p in resp.data] == ['knn-1']
+    resp = api_client.get(url, {'lat': 30.0, 'lng': 30.0, 'mode': 'knn', 'limit': 'abc'})
+    assert resp.status_code == 400
+
+
+def test_products_in_zone_keyset_pages(api_client, settings, stocked_product):
+    settings.ZONE_PRODUCTS_PAGE_SIZE = 2
+    zone = DeliveryZone.objects.create(name='Pages', area=Polygon(((40, 40), (40, 41), (41, 41), (41, 40), (40, 40))))
+    product = stocked_product('zone-pages', Point(40.5, 40.5), stock=1)
+    product.merchant.delivery_zones.add(zone)
+    for i in range(2):
+        Product.objects.create(name=f'zone-extra-{i}', category=product.category, merchant=product.merchant, price=1)
+    Product.objects.create(
+        name='zone-hidden', category=product.category, merchant=product.merchant, price=1, is_published=False
+    )
+    url = reverse('api:products-in-zone')
+    first = api_client.get(url, {'zone_id': zone.pk})
+    assert len(first.data) == 2
+    next_url = first['Link'].split(';')[0].strip('<>')
+    second = api_client.get(next_url)
+    assert [p['name'] for p in second.data] == ['zone-extra-1']
+    assert 'Link' not in second
+    settings.ZONE_PRODUCTS_PAGE_SIZE = 3
+    assert 'Link' not in api_client.get(url, {'zone_id': zone.pk})
+    assert api_client.get(url, {'zone_id': zone.pk, 'cursor': encode_cursor(['x'])}).status_code == 400
+
+    product.merchant.delivery_zones.remove(zone)
+    assert api_client.get(url, {'zone_id': zone.pk}).data == []
+
+
+def test_priority_assignment_top_k_with_load_weight(api_client, settings):
+    user = User.objects.create_user(username='topk', password='pw')
+    addr = Address.objects.create(
+        line1='N2', line2='', city='A', state='', postal_code='B4', country='PL', location=Point(21.0, 52.2)
+    )
+    merchant = Merchant.objects.create(user=user, name='TopK', address=addr)
+    order = Order.objects.create(user=user, merchant=merchant, address=addr, status='pending', total=10)
+    couriers = [
+        {'id': 1, 'lat': 52.201, 'lng': 21.0, 'load': 5},
+        {'id': 2, 'lat': 52.21, 'lng': 21.0, 'load': 0},
+        {'id': 3, 'lat': 52.3, 'lng': 21.0, 'load': 0},
+    ]
+    url = reverse('api:priority-assignment')
+    resp = api_client.post(url, {'order_id': order.pk, 'courier_locations': couriers, 'k': 2}, format='json')
+    assert [c['courier_id'] for c in resp.data['candidates']] == [1, 2]
+    assert resp.data['candidates'][1]['distance_km'] == pytest.approx(1.11, abs=0.01)
+    data = {'order_id': order.pk, 'courier_locations': couriers, 'weights': {'load': 1.0}}
+    resp = api_client.post(url, data, format='json')
+    assert resp.data['assigned']['courier_id'] == 2
+    settings.COURIER_MAX_CANDIDATES = 2
+    resp = api_client.post(url, {'order_id': order.pk, 'courier_locations': couriers, 'k': 10**9}, format='json')
+    assert len(resp.data['candidates']) == 2
+
+
+def test_priority_assignment_uses_live_courier_store(authenticated_api_client, user, settings):
+    settings.COURIER_STORE_BACKEND = 'memory'
+    addr = Address.objects.create(
+        line1='N3', line2='', city='A', state='', postal_code='B5', country='PL', location=Point(19.94, 50.06)
+    )
+    merchant = Merchant.objects.create(user=user, name='LiveSt', address=addr)
+    order = Order.objects.create(user=user, merchant=merchant, address=addr, status='pending', total=10)
+    pings = [
+        {'id': 'live-near', 'lat': 50.061, 'lng': 19.94},
+        {'id': 7, 'lat': 50.062, 'lng': 19.94},
+        {'id': 'live-far', 'lat': 50.2, 'lng': 19.94},
+        {'id': 'live-stale', 'lat': 50.0601, 'lng': 19.94, 'ts': 0},
+        {'id': 'live-bad', 'lat': 'north', 'lng': 19.94},
+    ]
+    resp = authenticated_api_client.post(reverse('api:courier-locations'), {'pings': pings}, format='json')
+    assert resp.status_code == status.HTTP_202_ACCEPTED
+    assert resp.data['accepted'] == 4 and resp.data['rejected'][0]['index'] == 4
+    url = reverse('api:priority-assignment')
+    resp = authenticated_api_client.post(url, {'order_id': order.pk, 'radius': 5, 'k': 5}, format='json')
+    assert [c['courier_id'] for c in resp.data['candidates']] == ['live-near', '7']
+
+
+def test_order_export_streams_ndjson_and_csv(api_client, stocked_product):
+    p1 = stocked_product('export-m1', Point(1, 1), stock=5)
+    p2 = stocked_product('export-m2', Point(2, 2), stock=5)
+    buyer = User.objects.create_user(username='export-buyer', password='pw')
+    order = OrderService.place_order(buyer, p1.merchant, p1.merchant.address, [(p1, 2)])
+    OrderService.place_order(buyer, p2.merchant, p2.merchant.address, [(p2, 1)])
+    url = reverse('api:order-export')
+
+    api_client.force_authenticate(buyer)
+    assert api_client.get(url).status_code == status.HTTP_403_FORBIDDEN
+
+    api_client.force_authenticate(User.objects.create_user(username='export-ops', password='pw', is_staff=True))
+    resp = api_client.get(url, {'merchant': p1.merchant_id})
+    assert resp['Content-Type'] == 'application/x-ndjson'
+    lines = [json.loads(line) for line in b''.join(resp.streaming_content).decode().splitlines()]
+    assert [line['id'] for line in lines] == [order.pk]
+    assert lines[0]['items'][0]['product'] == p1.pk
+    assert lines[0]['total'] == str(order.total)
+
+    resp = api_client.get(url, {'output': 'csv', 'status': 'pending', 'merchant': p2.merchant_id})
+    rows = list(csv.reader(b''.join(resp.streaming_content).decode().splitlines()))
+    assert rows[0][0] == 'id' and len(rows) == 2
+    assert int(rows[1][-4]) == p2.pk
+
+    yesterday = (order.created_at - timedelta(days=1)).date().isoformat()
+    resp = api_client.get(url, {'end': yesterday})
+    assert b''.join(resp.streaming_content) == b''
+    assert api_client.get(url, {'output': 'xml'}).status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_order_list_keyset_pages(api_client, stocked_product):
+    product = stocked_product('keyset-orders', Point(5, 5), stock=10)
+    merchant = product.merchant
+    orders = [OrderService.place_order(merchant.user, merchant, merchant.address, [(product, 1)]) for _ in range(3)]
+    url = reverse('api:order-list')
+
+    first = api_client.get(url, {'page_size': 2})
+    assert 'count' not in first.data
+    assert [o['id'] for o in first.data['results']] == [orders[2].pk, orders[1].pk]
+    second = api_client.get(first.data['next'])
+    assert [o['id'] for o in second.data['results']] == [orders[0].pk]
+    assert second.data['next'] is None
+
+    assert isinstance(api_client.get(url, {'count': 'approx'}).data['count'], int)
+    assert api_client.get(url, {'cursor': 'garbage'}).status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_product_projection_matches_serializer(api_client, stocked_product):
+    product = stocked_product('projection', Point(30, 30), stock=1)
+    Product.objects.create(
+        name='Ünïcode “desc”', description='long text', category=product.category, merchant=product.merchant, price=3
+    )
+    expected = ProductSerializer(Product.objects.order_by('-created_at', '-id'), many=True).data
+
+    resp = api_client.get(reverse('api:product-list'), {'page_size': 100})
+    assert resp.content == JSONRenderer().render({'next': None, 'results': expected})
+
+    nearby = api_client.get(reverse('api:product-nearby'), {'lat': 30, 'lng': 30, 'radius': 1, 'mode': 'knn'})
+    by_id = {p['id']: p for p in json.loads(JSONRenderer().render(expected))}
+    assert {p['id']: p for p in nearby.json()} == by_id
+
+
+def test_cached_reads_serve_rendered_body_with_etag(api_client, settings, stocked_product):
+    settings.CACHE_COMPRESS_MIN_BYTES = 1
+    product = stocked_product('etag', Point(31, 31), stock=1)
+    detail = reverse('api:product-detail', args=[product.pk])
+
+    first = api_client.get(detail)
+    assert first['ETag'] and first.data['name'] == 'etag-item'
+    assert api_client.get(detail, HTTP_IF_NONE_MATCH=first['ETag']).status_code == status.HTTP_304_NOT_MODIFIED
+
+    deflated = api_client.get(detail, HTTP_ACCEPT_ENCODING='gzip, deflate')
+    assert deflated['Content-Encoding'] == 'deflate'
+    assert zlib.decompress(deflated.content) == first.content
+    assert deflated['ETag'] != first['ETag'] and 'Accept-Encoding' in deflated['Vary']
+    assert api_client.get(detail, HTTP_IF_NONE_MATCH=deflated['ETag']).status_code == status.HTTP_200_OK
+    revalidated = api_client.get(detail, HTTP_ACCEPT_ENCODING='deflate', HTTP_IF_NONE_MATCH=deflated['ETag'])
+    assert revalidated.status_code == status.HTTP_304_NOT_MODIFIED
+    refused = api_client.get(detail, HTTP_ACCEPT_ENCODING='deflate;q=0, gzip')
+    assert 'Content-Encoding' not in refused and refused['ETag'] == first['ETag']
+
+    ProductService.unpublish_product(product)
+    changed = api_client.get(detail, HTTP_IF_NONE_MATCH=first['ETag'])
+    assert changed.status_code == status.HTTP_200_OK and changed['ETag'] != first['ETag']
+
+
+def test_inventory_bulk_upsert_json_csv_and_handoff(api_client, settings, monkeypatch, stocked_product):
+    p1 = stocked_product('bulk-inv', Point(6, 6), stock=1)
+    p2 = Product.objects.create(name='bulk-inv-2', category=p1.category, merchant=p1.merchant, price=1)
+    foreign = stocked_product('bulk-inv-other', Point(7, 7), stock=1)
+    url = reverse('api:inventory-bulk')
+    api_client.force_authenticate(p1.merchant.user)
+
+    rows = [
+        {'product': p1.pk, 'stock': 7},
+        {'product': p2.pk, 'stock': 3},
+        {'product': foreign.pk, 'stock': 9},
+        {'product': p1.pk, 'stock': -1},
+        {'stock': 1},
+    ]
+    resp = api_client.post(url, rows, format='json')
+    assert resp.status_code == status.HTTP_200_OK
+    assert resp.data['upserted'] == 2
+    assert [e['index'] for e in resp.data['errors']] == [2, 3, 4]
+    stock = dict(Inventory.objects.filter(merchant=p1.merchant).values_list('product_id', 'stock'))
+    assert stock == {p1.pk: 7, p2.pk: 3}
+    assert Inventory.objects.get(product=foreign).stock == 1
+
+    body = f'product,stock\n{p1.pk},4\n{p1.pk},5\n{p2.pk},oops\n'
+    resp = api_client.generic('POST', url, body, content_type='text/csv')
+    assert (resp.data['upserted'], resp.data['superseded']) == (1, 1)
+    assert [e['index'] for e in resp.data['errors']] == [2]
+    assert Inventory.objects.get(product=p1).stock == 5
+
+    settings.INVENTORY_BULK_SYNC_MAX_ROWS = 1
+    queued = []
+    monkeypatch.setattr('app.api.views.bulk_upsert_inventory.delay', lambda *args: queued.append(args) or Mock(id='t1'))
+    resp = api_client.post(url, rows[:2], format='json')
+    assert resp.status_code == status.HTTP_202_ACCEPTED and resp.data['task_id'] == 't1'
+    assert queued == [(p1.merchant_id, rows[:2])]
+
+    api_client.force_authenticate(User.objects.create_user(username='bulk-nobody', password='pw'))
+    assert api_client.post(url, rows, format='json').status_code == status.HTTP_403_FORBIDDEN
+
+
+def test_reservation_holds_stock_converts_and_expires(authenticated_api_client, user, stocked_product):
+    p1 = stocked_product('hold-m1', Point(1, 1), stock=5)
+    p2 = stocked_product('hold-m2', Point(2, 2), stock=5)
+    items = [{'product': p1.pk, 'quantity': 2}, {'product': p2.pk, 'quantity': 3}]
+    resp = authenticated_api_client.post(reverse('api:reservation-list'), {'items': items}, format='json')
+    assert resp.status_code == status.HTTP_201_CREATED and resp.data['status'] == 'held'
+    assert sorted(Inventory.objects.values_list('stock', flat=True)) == [2, 3]
+
+    url = reverse('api:reservation-checkout', args=[resp.data['id']])
+    resp = authenticated_api_client.post(url, {'address': p1.merchant.address_id}, format='json')
+    assert resp.status_code == status.HTTP_201_CREATED
+    assert {o['merchant'] for o in resp.data} == {p1.merchant_id, p2.merchant_id}
+    assert sorted(Inventory.objects.values_list('stock', flat=True)) == [2, 3]
+    resp = authenticated_api_client.post(url, {'address': p1.merchant.address_id}, format='json')
+    assert resp.status_code == status.HTTP_400_BAD_REQUEST
+
+    resp = authenticated_api_client.post(reverse('api:reservation-list'), {'items': items[:1]}, format='json')
+    detail = reverse('api:reservation-detail', args=[resp.data['id']])
+    assert authenticated_api_client.delete(detail).status_code == status.HTTP_204_NO_CONTENT
+    assert Inventory.objects.get(product=p1).stock == 3
+
+    reservations = [ReservationService.reserve(user, [(p1, 1)]) for _ in range(3)]
+    StockReservation.objects.filter(pk__in=[r.pk for r in reservations[:2]]).update(
+        expires_at=timezone.now() - timedelta(seconds=1)
+    )
+    assert Inventory.objects.get(product=p1).stock == 0
+    assert ReservationService.release_expired(batch_size=1) == 2
+    assert Inventory.objects.get(product=p1).stock == 2
+    statuses = StockReservation.objects.filter(pk__in=[r.pk for r in reservations]).values_list('status', flat=True)
+    assert sorted(statuses) == ['expired', 'expired', 'held']
+    url = reverse('api:reservation-checkout', args=[reservations[0].pk])
+    resp = authenticated_api_client.post(url, {'address': p1.merchant.address_id}, format='json')
+    assert resp.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_product_search_ranked_fuzzy_geo_and_autocomplete(api_client):
+    cat = ProductCategory.objects.create(name='Search')
+    catalog = [
+        ('Espresso Machine', 'Italian coffee maker', 40.0, True),
+        ('Coffee Grinder', '', 40.01, True),
+        ('Coffee Beans', 'Dark roast', 41.0, True),
+        ('Coffee Mug', '', 40.0, False),
+    ]
+    for i, (name, description, lat, published) in enumerate(catalog):
+        user = User.objects.create_user(username=f'search-{i}', password='pw')
+        addr = Address.objects.create(
+            line1='S', line2='', city='S', state='', postal_code='1', country='S', location=Point(40, lat)
+        )
+        merchant = Merchant.objects.create(user=user, name=f'search-{i}', address=addr)
+        Product.objects.create(
+            name=name, description=description, category=cat, merchant=merchant, price=1, is_published=published
+        )
+    url = reverse('api:product-search')
+    names = [p['name'] for p in api_client.get(url, {'q': 'coffee'}).data]
+    assert sorted(names) == ['Coffee Beans', 'Coffee Grinder', 'Espresso Machine']
+    assert names[-1] == 'Espresso Machine'
+    names = [p['name'] for p in api_client.get(url, {'q': 'cofee grindr'}).data]
+    assert names[0] == 'Coffee Grinder' and 'Coffee Beans' not in names
+    resp = api_client.get(url, {'q': 'coffee', 'lat': 40.0, 'lng': 40.0, 'radius': 5})
+    assert {p['name'] for p in resp.data} == {'Espresso Machine', 'Coffee Grinder'}
+    assert all(p['distance_km'] < 5 and p['score'] > 0 for p in resp.data)
+    assert api_client.get(url).status_code == status.HTTP_400_BAD_REQUEST
+
+    url = reverse('api:product-autocomplete')
+    assert api_client.get(url, {'prefix': 'cof'}).data == ['Coffee Beans', 'Coffee Grinder']
+    merchant = Merchant.objects.get(name='search-0')
+    Product.objects.create(name='coffee cup', category=cat, merchant=merchant, price=1)
+    assert api_client.get(url, {'prefix': 'COF'}).data == ['Coffee Beans', 'coffee cup', 'Coffee Grinder']
+
+
+def test_nearby_facets_counts_whole_radius_in_one_query(api_client, django_assert_max_num_queries):
+    fruit = ProductCategory.objects.create(name='Facet fruit')
+    veg = ProductCategory.objects.create(name='Facet veg')
+    stock = [
+        (50.0, [('apple', fruit, 1), ('pear', fruit, 3)]),
+        (50.01, [('plum', fruit, 5), ('leek', veg, 9)]),
+        (50.02, [('kale', veg, 9)]),
+        (51.0, [('far fig', fruit, 2)]),
+    ]
+    for i, (lat, products) in enumerate(stock):
+        user = User.objects.create_user(username=f'facet-{i}', password='pw')
+        addr = Address.objects.create(
+            line1='F', line2='', city='F', state='', postal_code='1', country='F', location=Point(50, lat)
+        )
+        merchant = Merchant.objects.create(user=user, name=f'facet-{i}', address=addr)
+        for name, category, price in products:
+            Product.objects.create(name=name, category=category, merchant=merchant, price=price)
+    url = reverse('api:product-nearby')
+    params = {'lat': 50.0, 'lng': 50.0, 'radius': 5, 'limit': 2, 'facets': 1}
+    with django_assert_max_num_queries(1):
+        resp = api_client.get(url, params)
+    assert sorted(p['name'] for p in resp.data['results']) == ['apple', 'pear']
+    facets = resp.data['facets']
+    assert (facets['total'], facets['merchants']) == (5, 3)
+    assert [(c['name'], c['count'], c['merchants']) for c in facets['categories']] == [
+        ('Facet fruit', 3, 2),
+        ('Facet veg', 2, 2),
+    ]
+    assert facets['price'][0] == {'min': '1.00', 'max': '2.00', 'count': 1}
+    assert facets['price'][-1] == {'min': '8.00', 'max': '9.00', 'count': 2}
+    assert sum(b['count'] for b in facets['price']) == 5
+
+    resp = api_client.get(url, {**params, 'product_name': 'eek'})
+    assert [p['name'] for p in resp.data['results']] == ['leek']
+    assert resp.data['facets']['total'] == 1
+
+
+def test_nearby_merchants_only_those_delivering_by_distance_paged(api_client, django_assert_max_num_queries):
+    cat = ProductCategory.objects.create(name='Deliverers')
+    zone = DeliveryZone.objects.create(name='Covers', area=Polygon(((60, 60), (60, 61), (61, 61), (61, 60), (60, 60))))
+    elsewhere = DeliveryZone.objects.create(
+        name='Elsewhere', area=Polygon(((62, 62), (62, 63), (63, 63), (63, 62), (62, 62)))
+    )
+    # At 60N a degree of longitude is half a degree of latitude: 'east' is further in degrees but nearer in km.
+    merchants = {}
+    for name, location, area in (
+        ('north', Point(60.5, 60.51), zone),
+        ('east', Point(60.515, 60.5), zone),
+        ('twin', Point(60.5, 60.51), zone),
+        ('far', Point(60.5, 60.53), zone),
+        ('other', Point(60.5, 60.501), elsewhere),
+    ):
+        user = User.objects.create_user(username=f'deliverer-{name}', password='pw')
+        addr = Address.objects.create(
+            line1='D', line2='', city='D', state='', postal_code='1', country='D', location=location
+        )
+        merchants[name] = MerchantService.create_merchant(user, name, addr, categories=[cat], delivery_zones=[area])
+    url = reverse('api:merchant-nearby')
+    with django_assert_max_num_queries(1):
+        first = api_client.get(url, {'lat': 60.5, 'lng': 60.5, 'page_size': 2})
+    assert [m['name'] for m in first.data['results']] == ['east', 'north']
+    assert first.data['results'][0]['categories'] == ['Deliverers']
+    assert first.data['results'][0]['distance_km'] == pytest.approx(0.82, abs=0.02)
+    second = api_client.get(first.data['next'])  # 'twin' ties 'north' on distance and follows it by id
+    assert [m['name'] for m in second.data['results']] == ['twin', 'far']
+    assert second.data['next'] is None
+
+    assert [m['name'] for m in api_client.get(url, {'lat': 62.5, 'lng': 62.5}).data['results']] == ['other']
+    merchants['far'].delivery_zones.clear()
+    resp = api_client.get(url, {'lat': 60.5, 'lng': 60.5})
+    assert [m['name'] for m in resp.data['results']] == ['east', 'north', 'twin']
+    assert api_client.get(url, {'lat': 60.5}).status_code == 400
+    assert api_client.get(url, {'lat': 60.5, 'lng': 60.5, 'cursor': encode_cursor(['x', 1])}).status_code == 400
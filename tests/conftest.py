@@ -1,9 +1,13 @@
-from typing import Any
+from typing import Any, Callable
 
 import pytest
 from django.contrib.auth.models import User
+from django.contrib.gis.geos import Point
 from rest_framework.test import APIClient
 
+from app.models import Address, Inventory, Merchant, Product, ProductCategory
+from app.services import InventoryService, MerchantService, ProductService
+
 
 @pytest.fixture
 def user(db: Any) -> User:
@@ -20,3 +24,42 @@ def api_client() -> APIClient:
 def authenticated_api_client(user: User, api_client: APIClient) -> APIClient:
     api_client.force_authenticate(user)
     return api_client
+
+
+@pytest.fixture
+def stocked_merchant(db: Any) -> Callable[..., tuple[User, Merchant, Address, list[Product]]]:
+    """Factory for a merchant with ``n_products`` products priced 1.5, each stocked through the services."""
+
+    def make(username: str, n_products: int, stock: int = 10) -> tuple[User, Merchant, Address, list[Product]]:
+        user = User.objects.create_user(username=username, password='pw')
+        addr = Address.objects.create(
+            line1='B1', line2='', city='K', state='', postal_code='BULK', country='C', location=Point(4, 4)
+        )
+        cat = ProductCategory.objects.create(name=f'Bulk-{username}')
+        merchant = MerchantService.create_merchant(user, f'Bulk-{username}', addr, categories=[cat])
+        products = []
+        for i in range(n_products):
+            product = ProductService.create_product(merchant, f'P{i}', cat, 1.5)
+            InventoryService.set_stock(merchant, product, stock)
+            products.append(Product.objects.get(pk=product.pk))
+        return user, merchant, addr, products
+
+    return make
+
+
+@pytest.fixture
+def stocked_product(db: Any) -> Callable[..., Product]:
+    """Factory for a merchant at ``location`` selling one ``<username>-item`` at 2 with ``stock`` units."""
+
+    def make(username: str, location: Point, stock: int) -> Product:
+        user = User.objects.create_user(username=username, password='pw')
+        addr = Address.objects.create(
+            line1=username, line2='', city='C', state='', postal_code='1', country='CC', location=location
+        )
+        cat, _ = ProductCategory.objects.get_or_create(name='Cart')
+        merchant = Merchant.objects.create(user=user, name=username, address=addr)
+        product = Product.objects.create(name=f'{username}-item', category=cat, merchant=merchant, price=2)
+        Inventory.objects.create(merchant=merchant, product=product, stock=stock)
+        return product
+
+    return make
@@ -9,7 +9,6 @@ from app.services import ProductService
 pytestmark = pytest.mark.django_db
 
 
-@pytest.mark.xfail(strict=True)
 def test_product_nearby_cache_invalidation(api_client):
     user = User.objects.create_user(username='cachetest', password='pw')
     cat = ProductCategory.objects.create(name='CacheCat')
@@ -8,7 +8,6 @@ from app.models import Address, DeliveryZone, Merchant, Product, ProductCategory
 pytestmark = pytest.mark.django_db
 
 
-@pytest.mark.xfail(strict=True)
 def test_products_in_zone(api_client):
     zone = DeliveryZone.objects.create(
         name='TestZone', area=Polygon(((-1, -1), (-1, 1), (1, 1), (1, -1), (-1, -1)), srid=4326)
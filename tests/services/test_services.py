@@ -1,12 +1,31 @@
 import asyncio
-from threading import Thread
+import io
+import time
+import uuid
+from threading import Event, Thread
 
 import pytest
 from django.contrib.auth.models import User
-from django.contrib.gis.geos import Point
+from django.contrib.gis.geos import Point, Polygon
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
 
-from app.models import Address, Merchant, Product, ProductCategory
-from app.services import DeliveryService, InventoryService, MerchantService, OrderService, ProductService
+from app.models import Address, DailySales, DeliveryZone, Inventory, Merchant, Product, ProductCategory, ZoneProduct
+from app.services import (
+    DeliveryService,
+    InventoryService,
+    MerchantService,
+    OrderService,
+    ProductService,
+    SalesRollupService,
+)
+from app.utils.cache import cache_stats_snapshot, get_or_compute
+from app.utils.catalog_import import import_catalog
+from app.utils.eta import EtaClient, EtaProvider, LocalEtaProvider
+from app.utils.local_cache import LocalCache
+from app.utils.travel_matrix import build_travel_matrix
+from app.utils.zone_index import zone_index
 
 pytestmark = pytest.mark.django_db
 
@@ -85,3 +104,245 @@ def test_delivery_eta_async():
         assert all(r['eta_minutes'] == 15 for r in resp)
 
     asyncio.run(coro())
+
+
+def test_place_order_bulk_constant_queries(stocked_merchant):
+    user, merchant, addr, products = stocked_merchant('bulk-small', 2)
+    with CaptureQueriesContext(connection) as small:
+        OrderService.place_order(user, merchant, addr, [(p, 2) for p in products])
+
+    user, merchant, addr, products = stocked_merchant('bulk-large', 8)
+    with CaptureQueriesContext(connection) as large:
+        order = OrderService.place_order(user, merchant, addr, [(p, 2) for p in products])
+    assert len(large) == len(small)
+    assert order.items.count() == 8
+    assert float(order.total) == 8 * 2 * 1.5
+    assert set(merchant.inventories.values_list('stock', flat=True)) == {8}
+
+
+def test_place_order_bulk_rolls_back_on_short_stock(stocked_merchant):
+    user, merchant, addr, products = stocked_merchant('bulk-short', 3, stock=2)
+    with pytest.raises(ValueError, match='Insufficient stock'):
+        OrderService.place_order(user, merchant, addr, [(products[0], 1), (products[1], 1), (products[2], 5)])
+    assert set(merchant.inventories.values_list('stock', flat=True)) == {2}
+    assert not merchant.orders.exists()
+
+
+def test_place_order_without_items_creates_empty_order(stocked_merchant):
+    user, merchant, addr, products = stocked_merchant('bulk-empty', 1, stock=3)
+    order = OrderService.place_order(user, merchant, addr, [])
+    assert (float(order.total), order.items.count()) == (0, 0)
+    assert merchant.inventories.get().stock == 3
+
+
+def test_place_order_rejects_address_outside_delivery_zones(stocked_merchant):
+    user, merchant, addr, products = stocked_merchant('zone-check', 1)
+    zone = DeliveryZone.objects.create(name='Z', area=Polygon(((3, 3), (3, 5), (5, 5), (5, 3), (3, 3))))
+    merchant.delivery_zones.add(zone)
+    outside = Address.objects.create(
+        line1='O', line2='', city='K', state='', postal_code='OUT', country='C', location=Point(9, 9)
+    )
+    with pytest.raises(ValueError, match='outside the delivery zones'):
+        OrderService.place_order(user, merchant, outside, [(products[0], 1)])
+    order = OrderService.place_order(user, merchant, addr, [(products[0], 1)])
+    assert order.items.count() == 1
+    assert zone_index.zones_for_points([(4, 4), (9, 9)]) == [{zone.pk}, set()]
+
+
+def test_eta_client_coalesces_and_bounds_concurrency(settings):
+    settings.ETA_MAX_CONCURRENCY = 2
+
+    class CountingProvider(EtaProvider):
+        calls = active = peak = 0
+
+        async def fetch(self, order_id):
+            CountingProvider.calls += 1
+            CountingProvider.active += 1
+            CountingProvider.peak = max(CountingProvider.peak, CountingProvider.active)
+            await asyncio.sleep(0.01)
+            CountingProvider.active -= 1
+            return {'order': order_id, 'eta_minutes': 7}
+
+    client = EtaClient(CountingProvider())
+    ids = [f'eta-{uuid.uuid4()}' for _ in range(4)]
+    resp = asyncio.run(client.get_many([ids[0], ids[0], *ids]))
+    assert [r['order'] for r in resp] == [ids[0], *ids]
+    assert CountingProvider.calls == 4
+    assert CountingProvider.peak == 2
+    asyncio.run(client.get_many(ids))
+    assert CountingProvider.calls == 4
+
+
+def test_local_eta_provider_uses_travel_matrix(settings, tmp_path, stocked_merchant):
+    settings.TRAVEL_MATRIX_DIR = str(tmp_path)
+    user, merchant, addr, products = stocked_merchant('eta-local', 1)
+    zone = Polygon(((3.9, 3.9), (3.9, 4.1), (4.1, 4.1), (4.1, 3.9), (3.9, 3.9)), srid=4326)
+    assert build_travel_matrix([zone]) > 0
+    far = Address.objects.create(
+        line1='F', line2='', city='K', state='', postal_code='FAR', country='C', location=Point(4.5, 4.0)
+    )
+    near = OrderService.place_order(user, merchant, addr, [(products[0], 1)])
+    away = OrderService.place_order(user, merchant, far, [(products[0], 1)])
+    etas = LocalEtaProvider.eta_for_orders([near.pk, away.pk, -1])
+    # Same cell: 120s handoff + 10 min prep; outside the grid: speed model over ~55.5 km at 20 km/h x 1.3.
+    assert etas[0] == {'order': near.pk, 'eta_minutes': 12}
+    assert etas[1]['eta_minutes'] == pytest.approx(2 + 10 + 55.5 * 1.3 / 20 * 60, abs=2)
+    assert etas[2] == {'order': -1, 'eta_minutes': None}
+
+
+def test_sales_rollup_tracks_orders_and_matches_rebuild(stocked_merchant):
+    user, merchant, addr, products = stocked_merchant('rollup', 2)
+    OrderService.place_order(user, merchant, addr, [(products[0], 2), (products[1], 1)])
+    OrderService.place_order(user, merchant, addr, [(products[0], 3)])
+    live = {row.product_id: (row.quantity, float(row.total)) for row in DailySales.objects.filter(merchant=merchant)}
+    assert live == {products[0].pk: (5, 7.5), products[1].pk: (1, 1.5)}
+    [top] = SalesRollupService.top_products(merchant_pk=merchant.pk)
+    assert top['product__id'] == products[0].pk
+
+    SalesRollupService.rebuild()
+    rebuilt = {row.product_id: (row.quantity, float(row.total)) for row in DailySales.objects.filter(merchant=merchant)}
+    assert rebuilt == live
+
+
+def test_get_or_compute_single_flight_and_stale_serving(settings):
+    settings.CACHE_EARLY_EXPIRY_BETA = 0
+    settings.CACHE_LOCK_WAIT = 0.1
+    key = f'stampede-{uuid.uuid4()}'
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return len(calls)
+
+    assert get_or_compute(key, compute, timeout=60, namespace='t') == 1
+    assert get_or_compute(key, compute, timeout=60, namespace='t') == 1
+    assert len(calls) == 1
+
+    # Expired while another worker holds the recompute lock: the stale value is served without computing.
+    entry = cache.get(key)
+    cache.set(key, {**entry, 'expires': 0}, timeout=60)
+    cache.add(f'{key}:lock', 'other-worker', timeout=5)
+    assert get_or_compute(key, compute, timeout=60, namespace='t') == 1
+    assert len(calls) == 1
+
+    # Nothing to serve and the holder never finishes: wait briefly, then compute uncached.
+    cache.delete(key)
+    assert get_or_compute(key, compute, timeout=60, namespace='t') == 2
+    assert cache.get(key) is None
+    cache.delete(f'{key}:lock')
+    assert get_or_compute(key, compute, timeout=60, namespace='t') == 3
+    assert cache_stats_snapshot()['t'] == {'miss': 2, 'hit': 1, 'stale': 1, 'lock_wait': 1, 'lock_timeout': 1}
+
+
+def test_local_cache_lru_and_cross_worker_invalidation(settings):
+    settings.LOCAL_CACHE_SIZES = {'t': 2}
+    settings.LOCAL_CACHE_TTL = 30
+    worker_a, worker_b = LocalCache(), LocalCache()
+    for worker in (worker_a, worker_b):
+        worker.get('t', 'warm-up')
+    time.sleep(0.2)  # let both invalidation listeners subscribe
+    for worker in (worker_a, worker_b):
+        for key in ('k1', 'k2', 'k3'):
+            worker.set('t', key, key.upper(), worker.epoch)
+    assert worker_b.get('t', 'k1') == (False, None)
+    assert worker_b.get('t', 'k3') == (True, 'K3')
+    assert worker_b.stats['t', 'eviction'] == 1
+
+    worker_a.invalidate(['k3'])
+    assert worker_a.get('t', 'k3') == (False, None)
+    deadline = time.monotonic() + 2
+    while worker_b.get('t', 'k3')[0] and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert worker_b.get('t', 'k3') == (False, None)
+    assert worker_b.get('t', 'k2') == (True, 'K2')
+
+
+def test_catalog_import_copies_merges_and_reports_rejects(stocked_merchant):
+    user, merchant, addr, products = stocked_merchant('catalog', 1)
+    zone = DeliveryZone.objects.create(name='CZ', area=Polygon(((3, 3), (3, 5), (5, 5), (5, 3), (3, 3))))
+    merchant.delivery_zones.add(zone)
+    category = products[0].category.name
+    body = (
+        'name,category,price,description,is_published\n'
+        f'P0,{category},2.25,updated,true\n'
+        'New,Imported,3,,yes\n'
+        'Hidden,Imported,4,,false\n'
+        'Bad,Imported,1.234,,\n'
+        ',Imported,1,,\n'
+        'Twice,Imported,1,,\n'
+        'Twice,Imported,5,,\n'
+    )
+    report = import_catalog(merchant.pk, io.StringIO(body), fmt='csv', chunk_rows=4)
+    assert (report['read'], report['created'], report['updated'], report['rejected']) == (7, 3, 1, 3)
+    assert sorted(r['line'] for r in report['rejects']) == [5, 6, 7]
+    assert report['rows_per_second'] is not None
+
+    imported = {p.name: p for p in Product.objects.filter(merchant=merchant)}
+    assert float(imported['P0'].price) == 2.25 and imported['P0'].description == 'updated'
+    assert float(imported['Twice'].price) == 5
+    assert imported['New'].category.name == 'Imported' and imported['New'].merchant_location == addr.location
+    zoned = set(ZoneProduct.objects.filter(zone=zone).values_list('product__name', flat=True))
+    assert zoned == {'P0', 'New', 'Twice'}
+
+    ndjson = '{"name": "New", "category": "Imported", "price": 6}\n{\n'
+    report = import_catalog(merchant.pk, io.StringIO(ndjson), fmt='ndjson')
+    assert (report['created'], report['updated'], report['rejected']) == (0, 1, 1)
+
+
+def test_hot_sku_shards_never_oversell_and_reconcile(stocked_merchant):
+    user, merchant, addr, products = stocked_merchant('hot-sku', 1, stock=10)
+    product = products[0]
+    inventory = InventoryService.set_hot_mode(merchant.inventories.get().pk, 4)
+    assert sorted(inventory.shards.values_list('stock', flat=True)) == [2, 2, 3, 3]
+
+    OrderService.place_order(user, merchant, addr, [(product, 1)])
+    OrderService.place_order(user, merchant, addr, [(product, 6)])  # more than any one shard holds
+    with pytest.raises(ValueError, match='Insufficient stock'):
+        OrderService.place_order(user, merchant, addr, [(product, 4)])
+    assert sum(inventory.shards.values_list('stock', flat=True)) == 3
+    assert Inventory.objects.get(pk=inventory.pk).stock == 10
+
+    assert InventoryService.reconcile_hot_stock() == 1
+    assert sorted(inventory.shards.values_list('stock', flat=True)) == [0, 1, 1, 1]
+    assert Inventory.objects.get(pk=inventory.pk).stock == 3
+
+    InventoryService.set_stock(merchant, product, 8)
+    assert sorted(inventory.shards.values_list('stock', flat=True)) == [2, 2, 2, 2]
+    OrderService.place_order(user, merchant, addr, [(product, 2)])
+    inventory = InventoryService.set_hot_mode(inventory.pk, 0)
+    assert (inventory.stock, inventory.shard_count, inventory.shards.count()) == (6, 0, 0)
+    assert InventoryService.decrement_stock_atomic(merchant, product, 6).stock == 0
+
+
+def test_hot_sku_order_waits_for_concurrent_reshard(transactional_db, stocked_merchant):
+    user, merchant, addr, products = stocked_merchant('hot-reshard', 1, stock=10)
+    inventory = InventoryService.set_hot_mode(merchant.inventories.get().pk, 1)
+    resharded, results = Event(), []
+
+    def reshard():
+        try:
+            with transaction.atomic():
+                InventoryService.set_hot_mode(inventory.pk, 4)
+                resharded.set()
+                time.sleep(0.3)  # keep the inventory row locked while the order arrives
+        finally:
+            connection.close()
+
+    def order():
+        resharded.wait()
+        try:
+            OrderService.place_order(user, merchant, addr, [(products[0], 5)])
+            results.append('success')
+        except ValueError as e:
+            results.append(str(e))
+        finally:
+            connection.close()
+
+    threads = [Thread(target=reshard), Thread(target=order)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == ['success']
+    assert inventory.shards.count() == 4
+    assert sum(inventory.shards.values_list('stock', flat=True)) == 5